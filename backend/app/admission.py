@@ -0,0 +1,343 @@
+# ========================================
+# Admission Control (rate limits + fair inference queue)
+# ========================================
+# Token bucket bawat (budget, requester). Ang requester ay ang Supabase
+# user kapag may valid na Bearer token, kung wala ay ang client IP.
+# Hiwalay ang budgets ng inference, ESP32 device commands at admin routes
+# para hindi maubos ng isang retry loop ang kapasidad ng iba.
+#
+# In-process (MemoryBackend) ang default. Para sa maraming replicas,
+# RATE_LIMIT_BACKEND=redis://host:6379/0 (kailangan ang `redis` package),
+# o magpasa ng sariling backend na may `take(key, rate, cost)` method
+# gamit ang rate_limiter.set_backend(). Sa worker thread tinatawag ang
+# `take` maliban kung `blocking = False` ang backend.
+#
+# Environment:
+#   RATE_LIMIT_ENABLED        1/0 (default 1)
+#   RATE_LIMIT_INFERENCE      hal. "30/min"; "off" para walang limit
+#   RATE_LIMIT_DEVICE         hal. "120/min"
+#   RATE_LIMIT_ADMIN          hal. "60/min"
+#   RATE_LIMIT_IDENTITY       token lookups bawat IP, hal. "60/min"
+#   RATE_LIMIT_BACKEND        "memory" (default) o redis:// URL
+#   TRUST_PROXY_HEADERS       1 kapag nasa likod ng nginx/ngrok (X-Forwarded-For)
+#   INFERENCE_CONCURRENCY     sabay-sabay na CNN inference (default 1)
+#   INFERENCE_QUEUE_PER_USER  max na naghihintay bawat requester (default 4)
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from app.logging_config import get_logger
+from app.metrics import ADMISSION_DECISIONS
+
+logger = get_logger("admission")
+
+BUDGET_INFERENCE = "inference"
+BUDGET_DEVICE = "device"
+BUDGET_ADMIN = "admin"
+# Supabase Auth lookups para sa hindi pa kilalang Bearer tokens, per client IP.
+# Sinisingil BAGO ang lookup para hindi makagawa ng walang limit na auth
+# traffic ang random tokens.
+BUDGET_IDENTITY = "identity"
+
+DEFAULT_RATES = {
+    BUDGET_INFERENCE: "30/min",
+    BUDGET_DEVICE: "120/min",
+    BUDGET_ADMIN: "60/min",
+    BUDGET_IDENTITY: "60/min",
+}
+
+_PERIODS = {"s": 1, "sec": 1, "second": 1, "m": 60, "min": 60, "minute": 60,
+            "h": 3600, "hour": 3600}
+_RATE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*/\s*([a-z]+)\s*$")
+
+
+def _env_flag(name, default):
+    return os.environ.get(name, default).strip().lower() not in ("0", "false", "no", "off", "")
+
+
+@dataclass(frozen=True)
+class Rate:
+    capacity: float          # burst size
+    refill_per_sec: float
+
+    def __str__(self):
+        return f"{self.capacity:g} burst, {self.refill_per_sec * 60:g}/min"
+
+
+def parse_rate(text):
+    """'30/min' -> Rate(30, 0.5). None kapag 'off'."""
+    if text is None or text.strip().lower() in ("off", "none", "0", ""):
+        return None
+    match = _RATE_PATTERN.match(text.lower())
+    if not match or match.group(2) not in _PERIODS:
+        raise ValueError(f"Invalid rate {text!r}; expected e.g. '30/min' or '5/s'")
+    count = float(match.group(1))
+    return Rate(capacity=count, refill_per_sec=count / _PERIODS[match.group(2)])
+
+
+def rates_from_env():
+    rates = {}
+    for budget, default in DEFAULT_RATES.items():
+        text = os.environ.get(f"RATE_LIMIT_{budget.upper()}", default)
+        try:
+            rates[budget] = parse_rate(text)
+        except ValueError as e:
+            logger.error(f"{e}; using default {default}")
+            rates[budget] = parse_rate(default)
+    return rates
+
+
+# ========================================
+# Token Bucket Backends
+# ========================================
+class MemoryBackend:
+    """Per-process buckets; ang pinakamatagal nang hindi ginagamit ang tinatanggal."""
+
+    # Walang I/O, kaya puwedeng tawagin diretso sa event loop
+    blocking = False
+
+    def __init__(self, max_keys=50000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    def take(self, key, rate, cost=1.0):
+        """Ibinabalik ang segundong hihintayin; 0.0 kapag pinapasok."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (rate.capacity, now))
+            tokens = min(rate.capacity, tokens + (now - updated) * rate.refill_per_sec)
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0.0
+            else:
+                retry_after = (cost - tokens) / rate.refill_per_sec
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+# Atomic na refill + take sa Redis; oras ng Redis server ang gamit para
+# pare-pareho sa lahat ng replicas
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill)
+local retry = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry = (cost - tokens) / refill
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill) + 1)
+return tostring(retry)
+"""
+
+
+class RedisBackend:
+    """Shared buckets para sa multi-replica deployments."""
+
+    # Network round trip; tinatawag sa worker thread ng RateLimiter.check
+    blocking = True
+
+    def __init__(self, url, prefix="geotech:ratelimit:"):
+        import redis  # optional dependency
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    def take(self, key, rate, cost=1.0):
+        result = self._script(keys=[self.prefix + key], args=[rate.capacity, rate.refill_per_sec, cost])
+        return float(result)
+
+
+def backend_from_env():
+    url = os.environ.get("RATE_LIMIT_BACKEND", "memory").strip()
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            return RedisBackend(url)
+        except ImportError:
+            logger.error("RATE_LIMIT_BACKEND is Redis but the redis package is not installed; using in-process buckets")
+    elif url != "memory":
+        logger.error(f"Unknown RATE_LIMIT_BACKEND {url!r}; using in-process buckets")
+    return MemoryBackend()
+
+
+# ========================================
+# Rate Limiter
+# ========================================
+class RateLimiter:
+    def __init__(self, backend=None, rates=None):
+        self.enabled = _env_flag("RATE_LIMIT_ENABLED", "1")
+        self.rates = rates if rates is not None else rates_from_env()
+        self.backend = backend or backend_from_env()
+
+    def set_backend(self, backend):
+        self.backend = backend
+
+    async def check(self, budget, key):
+        """Segundong hihintayin bago pumasok; 0.0 kapag admitted."""
+        rate = self.rates.get(budget)
+        if not self.enabled or rate is None:
+            return 0.0
+        try:
+            if getattr(self.backend, "blocking", True):
+                retry_after = await asyncio.to_thread(self.backend.take, f"{budget}:{key}", rate)
+            else:
+                retry_after = self.backend.take(f"{budget}:{key}", rate)
+        except Exception as e:
+            # Fail open: mas mabuting walang limit kaysa patayin ang buong API
+            logger.error(f"Rate limit backend error: {e}")
+            return 0.0
+        ADMISSION_DECISIONS.inc(budget=budget, result="throttled" if retry_after else "admitted")
+        return retry_after
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "rates": {budget: str(rate) if rate else "off" for budget, rate in self.rates.items()},
+        }
+
+
+# ========================================
+# Requester Identity
+# ========================================
+class IdentityCache:
+    """
+    Bearer token -> user id, para hindi tumawag sa Supabase Auth bawat
+    request. Naka-hash ang tokens; cached din ang invalid tokens ("").
+    """
+
+    def __init__(self, ttl=60.0, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        """Ibinabalik ang user id, "" kapag kilalang invalid, None kapag wala sa cache."""
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            return entry[0]
+
+    def put(self, token, user_id):
+        key = self._key(token)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (user_id or "", time.monotonic() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+TRUST_PROXY_HEADERS = _env_flag("TRUST_PROXY_HEADERS", "0")
+
+
+def client_ip(headers, peer_host):
+    if TRUST_PROXY_HEADERS:
+        forwarded = headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return peer_host or "unknown"
+
+
+# ========================================
+# Fair Inference Scheduler
+# ========================================
+class QueueFull(Exception):
+    pass
+
+
+class FairScheduler:
+    """
+    Limitadong inference slots na hinahati round-robin sa mga requester na
+    may naghihintay, kaya hindi makakasingit nang sunod-sunod ang iisang
+    client kahit marami itong naka-queue. Para sa iisang event loop.
+    """
+
+    def __init__(self, slots=None, per_user_queue=None):
+        self.slots = slots or int(os.environ.get("INFERENCE_CONCURRENCY", "1"))
+        self.per_user_queue = per_user_queue or int(os.environ.get("INFERENCE_QUEUE_PER_USER", "4"))
+        self._free = self.slots
+        self._waiters = {}         # key -> deque ng futures
+        self._rotation = deque()   # keys na may naghihintay, round-robin order
+
+    async def acquire(self, key):
+        if self._free > 0 and not self._rotation:
+            self._free -= 1
+            return
+        queue = self._waiters.get(key)
+        if queue is not None and len(queue) >= self.per_user_queue:
+            raise QueueFull(key)
+        if queue is None:
+            queue = self._waiters[key] = deque()
+            self._rotation.append(key)
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Nabigyan na ng slot bago na-cancel; ipasa sa susunod
+                self.release()
+            else:
+                self._discard(key, future)
+            raise
+
+    def _discard(self, key, future):
+        queue = self._waiters.get(key)
+        if queue is None or future not in queue:
+            return
+        queue.remove(future)
+        if not queue:
+            del self._waiters[key]
+            self._rotation.remove(key)
+
+    def release(self):
+        while self._rotation:
+            key = self._rotation.popleft()
+            queue = self._waiters[key]
+            future = queue.popleft()
+            if queue:
+                self._rotation.append(key)
+            else:
+                del self._waiters[key]
+            if not future.done():
+                future.set_result(None)
+                return
+        self._free += 1
+
+    def status(self):
+        return {
+            "slots": self.slots,
+            "active": self.slots - self._free,
+            "waiting": sum(len(q) for q in self._waiters.values()),
+            "waiting_requesters": len(self._rotation),
+            "per_user_queue": self.per_user_queue,
+        }
+
+
+rate_limiter = RateLimiter()
+identity_cache = IdentityCache()
+inference_scheduler = FairScheduler()
@@ -0,0 +1,192 @@
+# ========================================
+# Streaming Export ng Analysis Results
+# ========================================
+# Keyset pagination (id > last_id) sa soil_analysis_results; bawat page ay
+# isinusulat agad sa response bilang CSV o Parquet row group, kaya constant
+# ang memory kahit ilang buwan ng data ang i-export.
+#
+# Optional dependency ang Parquet: wala ang pyarrow sa requirements.txt
+# (`pip install pyarrow` kapag kailangan). CSV ang default; 501 ang
+# format=parquet kapag hindi naka-install.
+import csv
+import io
+import re
+from datetime import date, timedelta
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional
+    pa = None
+    pq = None
+
+EXPORT_PAGE_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    "id",
+    "created_at",
+    "engineer_id",
+    "location",
+    "total_weight",
+    "gravel_weight",
+    "sand_weight",
+    "gravel_percent",
+    "sand_percent",
+    "fines_percent",
+    "soil_type",
+    "predicted_soil_type",
+    "status",
+    "image_soil_type",
+)
+NUMERIC_COLUMNS = {
+    "total_weight", "gravel_weight", "sand_weight",
+    "gravel_percent", "sand_percent", "fines_percent",
+}
+
+# Parehong columns na hinahanap ng search box ng history views
+SEARCH_COLUMNS = ("soil_type", "predicted_soil_type", "image_soil_type", "status", "location")
+
+# Mga character na may kahulugan sa PostgREST or=(...) syntax
+_FILTER_UNSAFE = re.compile(r"[(),*%\\\"]")
+
+
+def parquet_available():
+    return pq is not None
+
+
+def _clean(value):
+    return _FILTER_UNSAFE.sub("", value).strip()
+
+
+def apply_export_filters(query, filters):
+    """
+    Parehong filters ng history views (EngineerAnalysisHistory/ExpertDashboard):
+    engineer_id, status, soil_type (contains), search (SEARCH_COLUMNS) at
+    date_from/date_to (inclusive, YYYY-MM-DD) kapalit ng date text search.
+    """
+    if filters.get("engineer_id"):
+        query = query.eq("engineer_id", filters["engineer_id"])
+    if filters.get("status"):
+        query = query.eq("status", filters["status"].upper())
+    if filters.get("soil_type"):
+        query = query.ilike("soil_type", f"%{_clean(filters['soil_type'])}%")
+    if filters.get("search"):
+        term = _clean(filters["search"])
+        if term:
+            query = query.or_(",".join(
+                f"{column}.ilike.%{term}%"
+                for column in SEARCH_COLUMNS
+            ))
+    if filters.get("date_from"):
+        query = query.gte("created_at", date.fromisoformat(filters["date_from"]).isoformat())
+    if filters.get("date_to"):
+        end = date.fromisoformat(filters["date_to"]) + timedelta(days=1)
+        query = query.lt("created_at", end.isoformat())
+    return query
+
+
+def iter_pages(supabase, select, filters=None, page_size=EXPORT_PAGE_SIZE):
+    """
+    Keyset pagination (id > last_id): isang page (list ng rows) bawat yield,
+    kaya hindi hinahawakan ang buong result set at hindi bumabagal ang mga
+    huling page gaya ng OFFSET.
+    """
+    last_id = None
+    while True:
+        query = supabase.table('soil_analysis_results').select(select)
+        query = apply_export_filters(query, filters or {})
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page = query.order("id").limit(page_size).execute().data or []
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["id"]
+
+
+# ----------------------------------------
+# CSV
+# ----------------------------------------
+def stream_csv(pages, stats=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for page in pages:
+        for row in page:
+            writer.writerow([row.get(column) for column in EXPORT_COLUMNS])
+        if stats is not None:
+            stats["rows"] += len(page)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    tail = buffer.getvalue()
+    if tail:
+        yield tail
+
+
+# ----------------------------------------
+# Parquet (isang row group bawat page)
+# ----------------------------------------
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object; kinukuha ng generator ang bytes pagkatapos ng bawat row group."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_schema():
+    return pa.schema([
+        (column, pa.float64() if column in NUMERIC_COLUMNS else pa.string())
+        for column in EXPORT_COLUMNS
+    ])
+
+
+def _page_to_table(page, schema):
+    arrays = []
+    for column in EXPORT_COLUMNS:
+        values = [row.get(column) for row in page]
+        if column in NUMERIC_COLUMNS:
+            values = [None if v is None else float(v) for v in values]
+        else:
+            values = [None if v is None else str(v) for v in values]
+        arrays.append(pa.array(values, type=schema.field(column).type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def stream_parquet(pages, stats=None):
+    if not parquet_available():
+        raise RuntimeError("Parquet export requires pyarrow")
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for page in pages:
+            writer.write_table(_page_to_table(page, schema))
+            if stats is not None:
+                stats["rows"] += len(page)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
@@ -0,0 +1,234 @@
+# ========================================
+# Dashboard Statistics (pre-aggregated)
+# ========================================
+# Sa halip na i-download ng bawat dashboard ang buong soil_analysis_results
+# table, dito na binibilang ang per-engineer/status/soil type/CNN prediction/
+# day counters. Incremental ang update (insert sa /command, status change sa
+# review, delete sa DELETE /analysis/{id}), at may periodic reconciliation
+# na nire-rebuild mula sa table para maitama ang drift (hal. rows na binura
+# diretso sa Supabase).
+import threading
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from app.analysis_export import iter_pages
+
+STATS_COLUMNS = "id, engineer_id, status, soil_type, predicted_soil_type, created_at, location, gravel_percent, sand_percent, fines_percent"
+RECENT_LIMIT = 5
+RECONCILE_PAGE_SIZE = 1000
+
+
+def normalize_status(status):
+    return status.upper() if status else "UNKNOWN"
+
+
+def _day(created_at):
+    if not created_at:
+        return "unknown"
+    return str(created_at)[:10]
+
+
+class _Bucket:
+    """Counters para sa isang scope (global o isang engineer)."""
+
+    def __init__(self):
+        self.total = 0
+        self.status = Counter()
+        self.soil_type = Counter()
+        self.predicted = Counter()
+        self.day = Counter()
+        self.recent = deque(maxlen=RECENT_LIMIT)
+
+    def add(self, row):
+        self.total += 1
+        self.status[normalize_status(row.get("status"))] += 1
+        self.soil_type[row.get("soil_type") or "Unknown"] += 1
+        self.predicted[row.get("predicted_soil_type") or "Not provided"] += 1
+        self.day[_day(row.get("created_at"))] += 1
+
+    def remove(self, row):
+        self.total -= 1
+        self.status[normalize_status(row.get("status"))] -= 1
+        self.soil_type[row.get("soil_type") or "Unknown"] -= 1
+        self.predicted[row.get("predicted_soil_type") or "Not provided"] -= 1
+        self.day[_day(row.get("created_at"))] -= 1
+        # Mapupunan muli ang bakanteng puwesto sa susunod na reconciliation
+        self.recent = deque((item for item in self.recent if item.get("id") != row.get("id")),
+                            maxlen=RECENT_LIMIT)
+
+    def push_recent(self, row):
+        # Pinakabago sa unahan (gaya ng order('created_at', desc))
+        items = sorted([*self.recent, row], key=lambda r: str(r.get("created_at") or ""), reverse=True)
+        self.recent = deque(items[:RECENT_LIMIT], maxlen=RECENT_LIMIT)
+
+    def set_recent_status(self, analysis_id, status):
+        for item in self.recent:
+            if item.get("id") == analysis_id:
+                item["status"] = status
+
+
+def _distribution(counter, key):
+    total = sum(v for v in counter.values() if v > 0)
+    return [
+        {key: name, "count": count,
+         "percentage": round(count / total * 100, 1) if total else 0.0}
+        for name, count in sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))
+        if count > 0
+    ]
+
+
+class DashboardStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._global = _Bucket()
+        self._engineers = {}
+        self.last_reconciled_at = None
+        self.reconcile_rows = 0
+        # Isang rebuild lang sa isang pagkakataon (periodic loop, admin reconcile,
+        # grain-size recompute); naghihintay ang susunod
+        self._rebuild_lock = threading.Lock()
+        # ("insert" | "delete" | "status", row, new_status) habang may rebuild,
+        # para i-replay pagkatapos ng swap
+        self._rebuilding = False
+        self._journal = []
+
+    def _recent_row(self, row):
+        return {column.strip(): row.get(column.strip()) for column in STATS_COLUMNS.split(",")}
+
+    def _apply_insert(self, scope_global, engineers, row):
+        recent = self._recent_row(row)
+        scope_global.add(row)
+        scope_global.push_recent(dict(recent))
+        engineer_id = row.get("engineer_id")
+        if engineer_id:
+            bucket = engineers.get(engineer_id)
+            if bucket is None:
+                bucket = engineers[engineer_id] = _Bucket()
+            bucket.add(row)
+            bucket.push_recent(dict(recent))
+
+    def _apply_delete(self, scope_global, engineers, row):
+        scope_global.remove(row)
+        bucket = engineers.get(row.get("engineer_id"))
+        if bucket is not None:
+            bucket.remove(row)
+
+    def record_insert(self, row):
+        """Tawagin pagkatapos ng bawat successful insert sa soil_analysis_results."""
+        row = dict(row)
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        with self._lock:
+            self._apply_insert(self._global, self._engineers, row)
+            if self._rebuilding:
+                self._journal.append(("insert", row, None))
+
+    def record_delete(self, row):
+        """Tawagin pagkatapos ng successful delete; `row` ay ang binurang row (STATS_COLUMNS)."""
+        row = dict(row)
+        with self._lock:
+            self._apply_delete(self._global, self._engineers, row)
+            if self._rebuilding:
+                self._journal.append(("delete", row, None))
+
+    def record_status_change(self, row, new_status):
+        """`row` ay ang estado BAGO ang update (kailangan ang lumang status)."""
+        old_key = normalize_status(row.get("status"))
+        new_key = normalize_status(new_status)
+        if old_key == new_key:
+            return
+        row = dict(row)
+        with self._lock:
+            self._apply_status(self._global, self._engineers, row, new_status)
+            if self._rebuilding:
+                self._journal.append(("status", row, new_status))
+
+    def _apply_status(self, scope_global, engineers, row, new_status):
+        buckets = [scope_global]
+        engineer_bucket = engineers.get(row.get("engineer_id"))
+        if engineer_bucket is not None:
+            buckets.append(engineer_bucket)
+        for bucket in buckets:
+            bucket.status[normalize_status(row.get("status"))] -= 1
+            bucket.status[normalize_status(new_status)] += 1
+            bucket.set_recent_status(row.get("id"), new_status)
+
+    def rebuild(self, rows):
+        """
+        Buuin mula sa simula at atomic na palitan ang kasalukuyang counters.
+
+        Ang mga pagbabago habang nagre-rebuild ay nire-replay bago ang swap,
+        batay sa status na nabasa ng rebuild para sa bawat row:
+          - insert ng row na wala sa nabasa,
+          - delete ng row na nabasa na,
+          - status change kung luma pa ang nabasang status.
+        """
+        with self._rebuild_lock:
+            return self._rebuild(rows)
+
+    def _rebuild(self, rows):
+        with self._lock:
+            self._rebuilding = True
+            self._journal = []
+        scope_global = _Bucket()
+        engineers = {}
+        seen = {}  # id -> status na nabasa (o na-replay)
+        try:
+            for row in rows:
+                self._apply_insert(scope_global, engineers, row)
+                seen[row.get("id")] = normalize_status(row.get("status"))
+        except Exception:
+            with self._lock:
+                self._rebuilding = False
+                self._journal = []
+            raise
+        with self._lock:
+            for op, row, new_status in self._journal:
+                row_id = row.get("id")
+                if op == "insert" and row_id not in seen:
+                    self._apply_insert(scope_global, engineers, row)
+                    seen[row_id] = normalize_status(row.get("status"))
+                elif op == "delete" and row_id in seen:
+                    self._apply_delete(scope_global, engineers, {**row, "status": seen.pop(row_id)})
+                elif op == "status" and seen.get(row_id) == normalize_status(row.get("status")):
+                    self._apply_status(scope_global, engineers, row, new_status)
+                    seen[row_id] = normalize_status(new_status)
+            self._global = scope_global
+            self._engineers = engineers
+            self._rebuilding = False
+            self._journal = []
+            self.last_reconciled_at = datetime.now(timezone.utc).isoformat()
+            self.reconcile_rows = len(seen)
+        return self.reconcile_rows
+
+    def snapshot(self, engineer_id=None):
+        with self._lock:
+            if engineer_id is None:
+                bucket = self._global
+            else:
+                bucket = self._engineers.get(engineer_id) or _Bucket()
+            status = Counter(bucket.status)
+            total = bucket.total
+            result = {
+                "scope": engineer_id or "all",
+                "total_analyses": total,
+                "approved": status["APPROVED"],
+                # Kasama ang walang status, gaya ng dating computation sa dashboards
+                "pending": status["PENDING"] + status["UNKNOWN"],
+                "disapproved": status["DISAPPROVED"],
+                "approval_rate": round(status["APPROVED"] / total * 100, 1) if total else 0.0,
+                "by_status": _distribution(status, "status"),
+                "by_soil_type": _distribution(bucket.soil_type, "soil_type"),
+                "by_predicted_soil_type": _distribution(bucket.predicted, "predicted_soil_type"),
+                "by_day": [{"day": d, "count": c} for d, c in sorted(bucket.day.items()) if c > 0],
+                "recent": [dict(item) for item in bucket.recent],
+                "last_reconciled_at": self.last_reconciled_at,
+            }
+        return result
+
+
+def iter_analysis_rows(supabase, page_size=RECONCILE_PAGE_SIZE):
+    for page in iter_pages(supabase, STATS_COLUMNS, page_size=page_size):
+        yield from page
+
+
+dashboard_stats = DashboardStats()
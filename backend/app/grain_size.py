@@ -0,0 +1,267 @@
+# ========================================
+# Grain-Size Computation at USCS Classification
+# ========================================
+# Kinukuwenta ng server ang gravel/sand/fines percentages mula sa raw na
+# timbang (total, gravel, sand) at ina-apply ang USCS coarse-grained rules
+# sa buong NumPy arrays nang sabay-sabay. Iisang engine para sa:
+#   - validation ng bawat ESP32 result (array na may isang sample), at
+#   - bulk recomputation ng history kapag nagbago ang rules.
+#
+# Walang Atterberg limits o gradation curve (Cu/Cc) ang device, kaya ang
+# kaya lang ay ang coarse-grained groups sa ibaba (parehong labels na
+# ginagamit ng history filters).
+from collections import Counter
+
+import numpy as np
+
+CLEAN_GRAVEL = 0
+GRAVEL_WITH_FINES = 1
+SILTY_CLAYEY_GRAVEL = 2
+CLEAN_SAND = 3
+SAND_WITH_FINES = 4
+SILTY_CLAYEY_SAND = 5
+CLAY_OR_SILT = 6
+UNCLASSIFIED = -1
+
+SOIL_CLASSES = (
+    "Clean gravel",
+    "Gravel with fines",
+    "Silty or clayey gravel",
+    "Clean sand",
+    "Sand with fines",
+    "Silty or clayey sand",
+    "Clay or Silt",
+)
+UNCLASSIFIED_LABEL = "Unclassified"
+# Huling entry ang UNCLASSIFIED para gumana ang _LABELS[-1]
+_LABELS = np.array(SOIL_CLASSES + (UNCLASSIFIED_LABEL,), dtype=object)
+
+# --- USCS THRESHOLDS (% ng total dry weight) ---
+CLEAN_FINES_MAX = 5.0      # < 5% fines = clean (GW/GP, SW/SP)
+DUAL_FINES_MAX = 12.0      # 5-12% fines = dual symbol (hal. SP-SM)
+FINE_GRAINED_MIN = 50.0    # >= 50% dumaan sa No. 200 = fine-grained
+
+# --- TOLERANCES ---
+WEIGHT_TOLERANCE_G = 1.0   # gravel + sand puwedeng lumampas nang kaunti sa total (scale drift)
+PERCENT_TOLERANCE = 0.5    # percentage points bago ituring na mali ang ESP32 value
+PERCENT_DECIMALS = 2
+
+# Mga USCS symbol na puwedeng ipadala ng firmware bilang soil_type
+_SYMBOL_CODES = {
+    **dict.fromkeys(("gw", "gp"), CLEAN_GRAVEL),
+    **dict.fromkeys(("gw-gm", "gw-gc", "gp-gm", "gp-gc"), GRAVEL_WITH_FINES),
+    **dict.fromkeys(("gm", "gc", "gc-gm"), SILTY_CLAYEY_GRAVEL),
+    **dict.fromkeys(("sw", "sp"), CLEAN_SAND),
+    **dict.fromkeys(("sw-sm", "sw-sc", "sp-sm", "sp-sc"), SAND_WITH_FINES),
+    **dict.fromkeys(("sm", "sc", "sc-sm"), SILTY_CLAYEY_SAND),
+    **dict.fromkeys(("ml", "cl", "cl-ml", "mh", "ch", "ol", "oh", "pt"), CLAY_OR_SILT),
+}
+_TEXT_CODES = {
+    **{label.lower(): code for code, label in enumerate(SOIL_CLASSES)},
+    **_SYMBOL_CODES,
+}
+
+PERCENT_FIELDS = ("gravel_percent", "sand_percent", "fines_percent")
+
+
+def _to_float(value):
+    try:
+        return np.nan if value is None else float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _floats(values):
+    # None at hindi numero (hal. "abc") -> NaN, para dumaan sa parehong invalid mask
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([_to_float(v) for v in values], dtype=np.float64)
+
+
+def compute_percentages(total_weight, gravel_weight, sand_weight):
+    """
+    Returns (gravel_percent, sand_percent, fines_percent, valid) na arrays.
+    NaN ang percentages ng invalid samples (walang total, negative, o
+    gravel + sand na lampas sa total).
+    """
+    total = _floats(total_weight)
+    gravel = _floats(gravel_weight)
+    sand = _floats(sand_weight)
+
+    with np.errstate(invalid="ignore"):
+        valid = (
+            np.isfinite(total) & np.isfinite(gravel) & np.isfinite(sand)
+            & (total > 0) & (gravel >= 0) & (sand >= 0)
+            & (gravel + sand <= total + WEIGHT_TOLERANCE_G)
+        )
+    safe_total = np.where(valid, total, 1.0)
+    gravel_pct = gravel / safe_total * 100.0
+    sand_pct = sand / safe_total * 100.0
+    fines_pct = np.clip(100.0 - gravel_pct - sand_pct, 0.0, None)
+
+    results = []
+    for pct in (gravel_pct, sand_pct, fines_pct):
+        pct = np.round(pct, PERCENT_DECIMALS)
+        pct[~valid] = np.nan
+        results.append(pct)
+    return (*results, valid)
+
+
+def classify_percentages(gravel_percent, sand_percent, fines_percent):
+    """USCS coarse-grained group codes (int8); UNCLASSIFIED kapag NaN ang input."""
+    gravel = _floats(gravel_percent)
+    sand = _floats(sand_percent)
+    fines = _floats(fines_percent)
+
+    with np.errstate(invalid="ignore"):
+        # Gravel kapag mas malaki sa kalahati ng coarse fraction ang naiwan sa No. 4
+        base = np.where(gravel > sand, CLEAN_GRAVEL, CLEAN_SAND)
+        offset = np.where(fines < CLEAN_FINES_MAX, 0, np.where(fines <= DUAL_FINES_MAX, 1, 2))
+        codes = (base + offset).astype(np.int8)
+        codes[fines >= FINE_GRAINED_MIN] = CLAY_OR_SILT
+    codes[~(np.isfinite(gravel) & np.isfinite(sand) & np.isfinite(fines))] = UNCLASSIFIED
+    return codes
+
+
+def labels_for(codes):
+    return _LABELS[np.asarray(codes)]
+
+
+def codes_for(soil_types):
+    """
+    Reported soil_type strings (labels o USCS symbols) -> codes.
+    Isang dict lookup lang bawat unique na value, hindi bawat row.
+    """
+    values = np.asarray(soil_types, dtype=object)
+    if values.size == 0:
+        return np.empty(0, dtype=np.int8)
+    normalized = np.array([str(v).strip().lower() if v is not None else "" for v in values.ravel()])
+    unique, inverse = np.unique(normalized, return_inverse=True)
+    lookup = np.array([_TEXT_CODES.get(u, UNCLASSIFIED) for u in unique], dtype=np.int8)
+    return lookup[inverse].reshape(values.shape)
+
+
+def classify_weights(total_weight, gravel_weight, sand_weight):
+    gravel_pct, sand_pct, fines_pct, valid = compute_percentages(total_weight, gravel_weight, sand_weight)
+    return {
+        "gravel_percent": gravel_pct,
+        "sand_percent": sand_pct,
+        "fines_percent": fines_pct,
+        "soil_code": classify_percentages(gravel_pct, sand_pct, fines_pct),
+        "valid": valid,
+    }
+
+
+def compare_reported(computed, gravel_percent, sand_percent, fines_percent, soil_type):
+    """
+    Per-sample mismatch masks ng reported (ESP32/stored) values laban sa computed.
+    Kasama sa percent mismatch ang nawawalang reported value (NaN).
+    """
+    mismatch = {}
+    for field, reported in zip(PERCENT_FIELDS, (gravel_percent, sand_percent, fines_percent)):
+        with np.errstate(invalid="ignore"):
+            mismatch[field] = ~(np.abs(_floats(reported) - computed[field]) <= PERCENT_TOLERANCE)
+    mismatch["soil_type"] = codes_for(soil_type) != computed["soil_code"]
+    for field in mismatch:
+        mismatch[field] &= computed["valid"]
+    return mismatch
+
+
+# ----------------------------------------
+# Single-request validation
+# ----------------------------------------
+def validate_analysis(data):
+    """
+    I-check ang isang ESP32 result. Returns dict:
+        valid      - consistent ba ang raw na timbang
+        mismatches - fields na lumihis sa server computation
+        computed   - server values (gamitin kapag may mismatch)
+    """
+    computed = classify_weights([data.get("total_weight")], [data.get("gravel_weight")],
+                                [data.get("sand_weight")])
+    mismatch = compare_reported(
+        computed,
+        [data.get("gravel_percent")], [data.get("sand_percent")], [data.get("fines_percent")],
+        [data.get("soil_type")],
+    )
+    valid = bool(computed["valid"][0])
+    return {
+        "valid": valid,
+        "mismatches": [field for field, mask in mismatch.items() if mask[0]],
+        "computed": {
+            **{field: float(computed[field][0]) for field in PERCENT_FIELDS},
+            "soil_type": str(labels_for(computed["soil_code"])[0]),
+        } if valid else None,
+    }
+
+
+# ----------------------------------------
+# Bulk recomputation ng stored results
+# ----------------------------------------
+GRAIN_SIZE_COLUMNS = "id, total_weight, gravel_weight, sand_weight, gravel_percent, sand_percent, fines_percent, soil_type"
+UPDATE_BATCH_SIZE = 200
+
+
+def _column(rows, key):
+    return [row.get(key) for row in rows]
+
+
+def diff_page(rows):
+    """Computed values at mismatch masks para sa isang page ng stored rows."""
+    computed = classify_weights(_column(rows, "total_weight"), _column(rows, "gravel_weight"),
+                                _column(rows, "sand_weight"))
+    mismatch = compare_reported(
+        computed,
+        _column(rows, "gravel_percent"), _column(rows, "sand_percent"), _column(rows, "fines_percent"),
+        _column(rows, "soil_type"),
+    )
+    return computed, mismatch
+
+
+def recompute_stored_results(supabase, pages, apply=False):
+    """
+    I-recompute ang bawat stored row at (kapag apply=True) isulat ang pagbabago.
+    Soil type-only na pagbabago ay naka-batch ayon sa bagong label (iisang
+    UPDATE ... WHERE id IN (...)); ang may maling percentages ay per-row.
+    """
+    summary = {
+        "rows": 0,
+        "invalid_weights": 0,
+        "percent_changes": 0,
+        "soil_type_changes": 0,
+        "updated": 0,
+        "transitions": Counter(),
+    }
+    for rows in pages:
+        computed, mismatch = diff_page(rows)
+        percent_changed = mismatch["gravel_percent"] | mismatch["sand_percent"] | mismatch["fines_percent"]
+        labels = labels_for(computed["soil_code"])
+
+        summary["rows"] += len(rows)
+        summary["invalid_weights"] += int((~computed["valid"]).sum())
+        summary["percent_changes"] += int(percent_changed.sum())
+        summary["soil_type_changes"] += int(mismatch["soil_type"].sum())
+        for i in np.flatnonzero(mismatch["soil_type"]):
+            summary["transitions"][f"{rows[i].get('soil_type')} -> {labels[i]}"] += 1
+
+        if not apply:
+            continue
+
+        by_label = {}
+        for i in np.flatnonzero(mismatch["soil_type"] & ~percent_changed):
+            by_label.setdefault(labels[i], []).append(rows[i]["id"])
+        for label, ids in by_label.items():
+            for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+                batch = ids[start:start + UPDATE_BATCH_SIZE]
+                supabase.table('soil_analysis_results').update({"soil_type": label}).in_('id', batch).execute()
+                summary["updated"] += len(batch)
+
+        for i in np.flatnonzero(percent_changed):
+            values = {field: float(computed[field][i]) for field in PERCENT_FIELDS}
+            values["soil_type"] = labels[i]
+            supabase.table('soil_analysis_results').update(values).eq('id', rows[i]["id"]).execute()
+            summary["updated"] += 1
+
+    summary["transitions"] = dict(summary["transitions"].most_common())
+    return summary
@@ -0,0 +1,184 @@
+# ========================================
+# Image Quality Gate (pre-CNN)
+# ========================================
+# Mabilis na checks bago patakbuhin ang MobileNetV2 forward pass.
+# Kung malabo o sobrang dilim/liwanag, hindi na natin sasayangin ang
+# inference sa capture na "Uncertain" din naman. Ang mababang soil coverage
+# ay flag lang (tuloy pa rin ang CNN).
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from app.metrics import (
+    IMAGE_QUALITY_REASONS,
+    IMAGE_QUALITY_RESULTS,
+    STAGE_LATENCY,
+    STAGE_QUALITY_GATE,
+)
+
+# --- THRESHOLDS (i-tune gamit ang totoong captures) ---
+# Laplacian variance sa 224x224 grayscale; mas mababa = mas malabo
+BLUR_VARIANCE_MIN = 60.0
+# Pixel intensities na itinuturing na "crushed" o "clipped"
+DARK_PIXEL_MAX = 20
+BRIGHT_PIXEL_MIN = 235
+# Fraction ng frame na puwedeng crushed/clipped bago i-reject
+DARK_FRACTION_MAX = 0.60
+BRIGHT_FRACTION_MAX = 0.40
+# Mean brightness range na katanggap-tanggap
+MEAN_BRIGHTNESS_MIN = 40.0
+MEAN_BRIGHTNESS_MAX = 220.0
+# Soil coverage (HSV mask ng pula/orange/brown/tan na lupa). Hindi sakop ng
+# hue mask ang grey/low-chroma na lupa, kaya FLAG LANG ang coverage hanggang
+# ma-tune sa totoong captures; blur at exposure lang ang nagre-reject.
+SOIL_HUE_MAX = 35           # OpenCV hue 0-179; orange/dilaw/brown na lupa
+SOIL_HUE_RED_MIN = 170      # pulang lupa sa kabilang dulo ng hue circle
+SOIL_SAT_MIN = 25
+SOIL_VALUE_MIN = 30
+SOIL_VALUE_MAX = 230
+SOIL_COVERAGE_NONE = 0.15    # mas mababa dito = halos walang kulay-lupa sa frame
+SOIL_COVERAGE_FLAG = 0.40    # mas mababa dito = low coverage flag
+
+STATUS_OK = "ok"
+STATUS_FLAGGED = "flagged"
+STATUS_REJECTED = "rejected"
+
+REASON_BLURRY = "blurry"
+REASON_TOO_DARK = "too_dark"
+REASON_OVEREXPOSED = "overexposed"
+REASON_NO_SOIL = "insufficient_soil_coverage"
+REASON_LOW_SOIL = "low_soil_coverage"
+
+
+def assess_image_quality(img_bgr):
+    """
+    Check blur, exposure at soil coverage ng isang BGR image.
+
+    Dapat naka-resize na ang image (hal. IMG_SIZE) para manatiling
+    sub-millisecond ang check.
+
+    Returns:
+        dict na may status ("ok" | "flagged" | "rejected"), reasons, at metrics
+    """
+    start = time.perf_counter()
+
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+    total_pixels = float(gray.size)
+
+    # Blur: variance ng Laplacian (kaunting edges = malabo)
+    blur_variance = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+    # Exposure: 256-bin histogram, tapos bilangin ang dulo
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+    dark_fraction = float(hist[:DARK_PIXEL_MAX + 1].sum() / total_pixels)
+    bright_fraction = float(hist[BRIGHT_PIXEL_MIN:].sum() / total_pixels)
+    mean_brightness = float(np.dot(hist, np.arange(256)) / total_pixels)
+
+    # Soil coverage: fraction ng pixels na pasok sa soil color range
+    hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
+    soil_mask = cv2.inRange(
+        hsv,
+        (0, SOIL_SAT_MIN, SOIL_VALUE_MIN),
+        (SOIL_HUE_MAX, 255, SOIL_VALUE_MAX),
+    ) | cv2.inRange(
+        hsv,
+        (SOIL_HUE_RED_MIN, SOIL_SAT_MIN, SOIL_VALUE_MIN),
+        (179, 255, SOIL_VALUE_MAX),
+    )
+    soil_coverage = float(cv2.countNonZero(soil_mask) / total_pixels)
+
+    rejected = []
+    flagged = []
+
+    if blur_variance < BLUR_VARIANCE_MIN:
+        rejected.append(REASON_BLURRY)
+    if dark_fraction > DARK_FRACTION_MAX or mean_brightness < MEAN_BRIGHTNESS_MIN:
+        rejected.append(REASON_TOO_DARK)
+    if bright_fraction > BRIGHT_FRACTION_MAX or mean_brightness > MEAN_BRIGHTNESS_MAX:
+        rejected.append(REASON_OVEREXPOSED)
+    # Flag lang: puwedeng grey na lupa ang capture na mababa ang coverage
+    if soil_coverage < SOIL_COVERAGE_NONE:
+        flagged.append(REASON_NO_SOIL)
+    elif soil_coverage < SOIL_COVERAGE_FLAG:
+        flagged.append(REASON_LOW_SOIL)
+
+    if rejected:
+        status = STATUS_REJECTED
+    elif flagged:
+        status = STATUS_FLAGGED
+    else:
+        status = STATUS_OK
+
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+    result = {
+        "status": status,
+        "reasons": rejected + flagged,
+        "metrics": {
+            "blur_variance": round(blur_variance, 2),
+            "dark_fraction": round(dark_fraction, 4),
+            "bright_fraction": round(bright_fraction, 4),
+            "mean_brightness": round(mean_brightness, 2),
+            "soil_coverage": round(soil_coverage, 4),
+        },
+        "elapsed_ms": round(elapsed_ms, 4),
+    }
+    quality_stats.record(result)
+    return result
+
+
+# ========================================
+# Rejection Stats
+# ========================================
+class QualityGateStats:
+    """Thread-safe counters para makita kung ilang inference ang natitipid."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checked = 0
+            self.passed = 0
+            self.flagged = 0
+            self.rejected = 0
+            self.by_reason = {}
+            self.total_elapsed_ms = 0.0
+
+    def record(self, result):
+        IMAGE_QUALITY_RESULTS.inc(status=result["status"])
+        for reason in result["reasons"]:
+            IMAGE_QUALITY_REASONS.inc(reason=reason)
+        STAGE_LATENCY.observe(result["elapsed_ms"] / 1000.0, stage=STAGE_QUALITY_GATE)
+        with self._lock:
+            self.checked += 1
+            self.total_elapsed_ms += result["elapsed_ms"]
+            if result["status"] == STATUS_REJECTED:
+                self.rejected += 1
+            elif result["status"] == STATUS_FLAGGED:
+                self.flagged += 1
+            else:
+                self.passed += 1
+            for reason in result["reasons"]:
+                self.by_reason[reason] = self.by_reason.get(reason, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            checked = self.checked
+            return {
+                "checked": checked,
+                "passed": self.passed,
+                "flagged": self.flagged,
+                "rejected": self.rejected,
+                "by_reason": dict(self.by_reason),
+                # Bawat rejection = isang CNN forward pass na hindi na tinakbo
+                "rejection_rate": (self.rejected / checked) if checked else 0.0,
+                "inference_saved": self.rejected,
+                "avg_check_ms": (self.total_elapsed_ms / checked) if checked else 0.0,
+            }
+
+
+quality_stats = QualityGateStats()
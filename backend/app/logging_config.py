@@ -0,0 +1,176 @@
+# ========================================
+# Structured, Non-blocking Logging
+# ========================================
+# Pinapalitan nito ang print() sa hot path. Ang request thread ay naglalagay
+# lang ng record sa queue; isang background listener thread ang sumusulat sa
+# stdout bilang JSON lines. May request-ID correlation at per-route sampling.
+#
+# Environment variables:
+#   LOG_LEVEL         - DEBUG | INFO | WARNING | ERROR (default: INFO)
+#   LOG_FORMAT        - json | text (default: json)
+#   LOG_SAMPLE_RATES  - per-route sampling ng INFO/DEBUG, hal.
+#                       "/predict=0.1,/predict-with-threshold=0.1,/metrics=0"
+#                       (WARNING pataas ay laging naka-log)
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Naka-set per request ng middleware; sinusundan ang ESP32 → auth → upload → insert chain
+request_id_var = contextvars.ContextVar("request_id", default="-")
+route_var = contextvars.ContextVar("route", default="-")
+# Sampling decision para sa buong request (para buo ang chain kapag na-sample)
+sampled_var = contextvars.ContextVar("sampled", default=True)
+
+LOGGER_NAME = "geotech"
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+def parse_sample_rates(raw):
+    """'/predict=0.1,/command=1' -> {'/predict': 0.1, '/command': 1.0}"""
+    rates = {}
+    for item in (raw or "").split(","):
+        if "=" not in item:
+            continue
+        route, rate = item.split("=", 1)
+        try:
+            rates[route.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+SAMPLE_RATES = parse_sample_rates(os.environ.get("LOG_SAMPLE_RATES", ""))
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:16]
+
+
+def begin_request(path, request_id=None):
+    """
+    Itakda ang request context (ID, route, sampling decision).
+
+    Returns:
+        (request_id, tokens) - ibalik ang tokens sa end_request()
+    """
+    request_id = request_id or new_request_id()
+    rate = SAMPLE_RATES.get(path, 1.0)
+    sampled = rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+    tokens = (
+        request_id_var.set(request_id),
+        route_var.set(path),
+        sampled_var.set(sampled),
+    )
+    return request_id, tokens
+
+
+def end_request(tokens):
+    request_id_token, route_token, sampled_token = tokens
+    request_id_var.reset(request_id_token)
+    route_var.reset(route_token)
+    sampled_var.reset(sampled_token)
+
+
+class ContextFilter(logging.Filter):
+    """Idagdag ang request context at i-drop ang hindi na-sample na INFO/DEBUG."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        record.route = route_var.get()
+        if record.levelno < logging.WARNING and not sampled_var.get():
+            return False
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "route": getattr(record, "route", "-"),
+        }
+        # Extra fields mula sa logger.info(..., extra={...})
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and key not in payload:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Hindi pinapatakbo ang JSON formatter sa request thread; ang message args
+    at exc_info lang ang ginagawang string bago ilagay sa queue.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging():
+    """I-configure ang 'geotech' logger (idempotent)."""
+    global _listener
+
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is not None:
+        return logger
+
+    level = os.environ.get("LOG_LEVEL", "INFO").upper()
+    logger.setLevel(getattr(logging, level, logging.INFO))
+    logger.propagate = False
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if os.environ.get("LOG_FORMAT", "json").lower() == "text":
+        stream_handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s [%(request_id)s %(route)s] %(message)s"
+        ))
+    else:
+        stream_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    logger.handlers = [queue_handler]
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return logger
+
+
+def shutdown_logging():
+    """I-flush ang natitirang records sa queue."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name=None):
+    setup_logging()
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
@@ -1,11 +1,13 @@
 from dotenv import load_dotenv
 from pathlib import Path
 import os
-from fastapi import FastAPI, HTTPException, Request, Header, Response
+from fastapi import FastAPI, HTTPException, Request, Header, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, FileResponse, StreamingResponse
 import time
 import json
+import math
+import asyncio
 from supabase import create_client, Client
 import base64
 import cv2
@@ -18,6 +20,29 @@ import tensorflow as tf
 from tensorflow import keras
 from pydantic import BaseModel # Added for /receive-analysis data structure
 from typing import Optional
+from app.logging_config import get_logger, begin_request, end_request, request_id_var, REQUEST_ID_HEADER
+from app.profiling import (
+    request_profiler, tf_tracer, list_profiles, resolve_profile, follow_thread, PROFILE_HEADER,
+)
+from app.dashboard_stats import dashboard_stats, iter_analysis_rows, normalize_status, STATS_COLUMNS
+from app.analysis_export import (
+    EXPORT_COLUMNS, EXPORT_PAGE_SIZE, iter_pages, parquet_available, stream_csv, stream_parquet,
+)
+from app.image_quality import assess_image_quality, quality_stats, STATUS_REJECTED
+from app.metrics import (
+    CONTENT_TYPE_LATEST, DEVICE_ERRORS, INFERENCE_QUEUE_DEPTH, PREDICTION_OUTCOMES,
+    REQUEST_LATENCY, STAGE_LATENCY, render_metrics,
+    STAGE_BASE64_DECODE, STAGE_IMDECODE, STAGE_PREPROCESS, STAGE_MODEL_FORWARD,
+    STAGE_SUPABASE_AUTH, STAGE_STORAGE_UPLOAD, STAGE_DB_INSERT, STAGE_ESP32_ROUND_TRIP,
+    GRAIN_SIZE_CHECKS, ADMISSION_DECISIONS, STAGE_INFERENCE_QUEUE,
+)
+from app.admission import (
+    BUDGET_ADMIN, BUDGET_DEVICE, BUDGET_IDENTITY, BUDGET_INFERENCE, QueueFull,
+    IdentityCache, client_ip, identity_cache, inference_scheduler, rate_limiter,
+)
+from app.grain_size import (
+    GRAIN_SIZE_COLUMNS, PERCENT_FIELDS, recompute_stored_results, validate_analysis,
+)
 
 class CommandRequest(BaseModel):
     input: str
@@ -29,6 +54,9 @@ class CommandRequest(BaseModel):
 ENV_PATH = Path(__file__).resolve().parent.parent / ".env"
 load_dotenv(dotenv_path=ENV_PATH)
 
+# Structured logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATES sa environment)
+logger = get_logger("main")
+
 # ========================================
 # GLOBAL VARIABLES (Initialisation)
 # ========================================
@@ -39,7 +67,8 @@ cnn_status = "model_not_loaded"
 
 # --- CONFIGURATION (Kailangan mong i-update ito!) ---
 # PAKI-UPDATE ITO gamit ang Local IP Address ng iyong ESP32.
-ESP32_IP = "http://192.168.1.210" 
+# Puwedeng i-override ng ESP32_IP env var (hal. simulated ESP32 sa bench/)
+ESP32_IP = os.environ.get("ESP32_IP", "http://192.168.1.210")
 ESP32_COMMAND_URL = f"{ESP32_IP}/command"
 # ----------------------------------------------------
 
@@ -99,11 +128,83 @@ async def log_exceptions(request: Request, call_next):
         response = await call_next(request)
         return response
     except Exception as e:
-        print(f"Unhandled error: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception(f"Unhandled error: {str(e)}")
         return JSONResponse(status_code=500, content={"detail": f"Server error: {str(e)}"})
 
+# Bearer token -> admin id ("" kapag hindi admin), para hindi tumawag sa
+# Supabase bawat request na may X-Profile header
+profile_admin_cache = IdentityCache()
+
+
+def _profile_admin_id(authorization):
+    try:
+        return verify_admin(authorization).id
+    except HTTPException:
+        return ""
+
+
+async def _profile_header_allowed(request: Request):
+    authorization = request.headers.get("authorization")
+    if not authorization or not authorization.startswith("Bearer "):
+        return False
+    token = authorization.split("Bearer ")[1]
+    admin_id = profile_admin_cache.get(token)
+    if admin_id is None:
+        # Hindi pa kilala ang token: singilin muna ang IP bago ang admin lookup
+        ip_key = f"ip:{client_ip(request.headers, request.client.host if request.client else None)}"
+        if await rate_limiter.check(BUDGET_IDENTITY, ip_key):
+            return False
+        admin_id = await asyncio.to_thread(_profile_admin_id, authorization)
+        profile_admin_cache.put(token, admin_id)
+    return bool(admin_id)
+
+
+# On-demand profiling: sampled requests o X-Profile header (admin lang)
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    explicit = False
+    if request.headers.get(PROFILE_HEADER):
+        explicit = await _profile_header_allowed(request)
+        if not explicit:
+            logger.warning("Ignoring profile header from non-admin requester")
+
+    interval = request_profiler.choose_interval(explicit)
+    if interval is None:
+        return await call_next(request)
+
+    mode = "header" if explicit else "sampled"
+    with request_profiler.profile(interval, request.url.path, request_id_var.get(), mode):
+        return await call_next(request)
+
+# Request ID correlation: tumatagos sa ESP32 → auth → upload → insert logs
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    request_id, tokens = begin_request(request.url.path, request.headers.get(REQUEST_ID_HEADER))
+    try:
+        response = await call_next(request)
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+    finally:
+        end_request(tokens)
+
+# Request latency per route (route template, hindi raw path, para hindi sumabog ang labels)
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+
 # Supabase configuration (service client)
 # ------------------------------------------------------------------
 # 🛑 FIX: Basahin ang variables mula sa Environment, hindi hardcoded!
@@ -112,18 +213,16 @@ SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
 # ------------------------------------------------------------------
 
-# Debugging print statement para i-verify
-print(f"DEBUG: SUPABASE_URL (ENV): {SUPABASE_URL}")
-if SUPABASE_SERVICE_ROLE_KEY:
-    print(f"DEBUG: SUPABASE_SERVICE_ROLE_KEY (ENV) First 5 chars: {SUPABASE_SERVICE_ROLE_KEY[:5]}...")
-else:
+# Huwag i-log ang anumang bahagi ng service key
+logger.debug(f"SUPABASE_URL (ENV): {SUPABASE_URL}")
+if not SUPABASE_SERVICE_ROLE_KEY:
     # Mag-throw ng error kung hindi na-load ang key
     raise ValueError("SUPABASE_SERVICE_ROLE_KEY environment variable not loaded!")
 
 
 if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
     # Handling para sa development kung wala talagang .env, pero sa Docker dapat loaded
-    print("FATAL: Supabase credentials are not loaded from environment variables!")
+    logger.critical("Supabase credentials are not loaded from environment variables!")
     # Maglagay ng default value kung kailangan, pero mas maganda kung mag-e-exit ang app
     # Para sigurado na hindi mag-e-expose ng hardcoded key sa code
     supabase: Client = None # Temporary placeholder
@@ -137,11 +236,11 @@ else:
 try:
     if supabase:
         response = supabase.table('soil_analysis_results').select('*').limit(1).execute()
-        print("Supabase connection successful:", response)
+        logger.info("Supabase connection successful")
     else:
-        print("Supabase client not initialized due to missing credentials.")
+        logger.error("Supabase client not initialized due to missing credentials.")
 except Exception as e:
-    print("Supabase connection error:", str(e))
+    logger.error(f"Supabase connection error: {str(e)}")
     # Dito dapat lumalabas ang Supabase Auth error, pero ngayon ay mahahandle na.
 
 # ========================================
@@ -154,11 +253,11 @@ CONFIDENCE_THRESHOLD = 0.8
 CLASSES = ["Clay Sand", "Silty Sand"]
 
 # Load CNN model
-print("Loading CNN model...")
+logger.info("Loading CNN model...")
 def load_model():
     global cnn_model, cnn_status
-    print(f"Attempting to load model from path: {CNN_MODEL_PATH}") # Debugging
-    print(f"Is path existing? {os.path.exists(CNN_MODEL_PATH)}")
+    logger.debug(f"Attempting to load model from path: {CNN_MODEL_PATH}")
+    logger.debug(f"Is path existing? {os.path.exists(CNN_MODEL_PATH)}")
     try:
         # Pilitin ang TensorFlow na i-load ang model nang hindi ito ki-nocompile ulit
         cnn_model = tf.keras.models.load_model(CNN_MODEL_PATH, compile=False)
@@ -169,19 +268,18 @@ def load_model():
         # I-update ang global status variable
         cnn_status = "loaded" 
         
-        print(f"✓ CNN model loaded successfully")
-        print(f"  Model architecture: {cnn_model.name}")
-        print(f"  Input shape: {cnn_model.input_shape}")
-        print(f"  Output shape: {cnn_model.output_shape}")
-        print(f"  Confidence threshold: {CONFIDENCE_THRESHOLD}")
-        print(f"  Classes: {CLASSES}")
+        logger.info("CNN model loaded successfully", extra={
+            "model_name": cnn_model.name,
+            "input_shape": str(cnn_model.input_shape),
+            "output_shape": str(cnn_model.output_shape),
+            "confidence_threshold": CONFIDENCE_THRESHOLD,
+            "classes": CLASSES,
+        })
     except FileNotFoundError:
-        print(f"ERROR: CNN model not found at {CNN_MODEL_PATH}")
+        logger.error(f"CNN model not found at {CNN_MODEL_PATH}")
         cnn_status = "file_not_found"
     except Exception as e:
-        print(f"ERROR loading CNN model (TensorFlow issue): {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error loading CNN model (TensorFlow issue): {e}")
         cnn_status = "model_loading_failed"
 
 # ----------------------------------------
@@ -192,22 +290,47 @@ load_model()
 # ========================================
 # CNN Prediction Function
 # ========================================
-def predict_with_cnn(image, confidence_threshold=CONFIDENCE_THRESHOLD):
+def predict_with_cnn(image, confidence_threshold=CONFIDENCE_THRESHOLD, quality_gate=True):
     """Predict soil type using CNN with MobileNetV2"""
     if cnn_model is None:
         raise ValueError("CNN model not loaded")
     
     try:
-        # Preprocess image for MobileNetV2
+        # Preprocess image for MobileNetV2. Hinati ng quality gate ang preprocessing,
+        # kaya pinagsasama ang dalawang bahagi sa iisang observation bawat prediction.
+        preprocess_start = time.perf_counter()
         img_resized = cv2.resize(image, IMG_SIZE)
+        preprocess_s = time.perf_counter() - preprocess_start
+
+        # Quality gate: i-skip ang CNN kung malabo/madilim/walang lupa
+        quality = None
+        if quality_gate:
+            quality = assess_image_quality(img_resized)
+            if quality["status"] == STATUS_REJECTED:
+                logger.info("CNN skipped: image rejected", extra={"reasons": quality["reasons"]})
+                STAGE_LATENCY.observe(preprocess_s, stage=STAGE_PREPROCESS)
+                PREDICTION_OUTCOMES.inc(outcome="rejected")
+                return {
+                    "soil_type": "Uncertain",
+                    "confidence": 0.0,
+                    "status": "uncertain",
+                    "probabilities": {cls: 0.0 for cls in CLASSES},
+                    "threshold": confidence_threshold,
+                    "quality": quality
+                }
+
+        preprocess_start = time.perf_counter()
         img_rgb = cv2.cvtColor(img_resized, cv2.COLOR_BGR2RGB)
-        
+
         # MobileNetV2 preprocessing: scale to [-1, 1]
         img_preprocessed = mobilenet_v2_preprocess(img_rgb)
         img_batch = np.expand_dims(img_preprocessed, axis=0)
+        preprocess_s += time.perf_counter() - preprocess_start
+        STAGE_LATENCY.observe(preprocess_s, stage=STAGE_PREPROCESS)
         
         # Get predictions
-        predictions = cnn_model.predict(img_batch, verbose=0)[0]
+        with STAGE_LATENCY.time(stage=STAGE_MODEL_FORWARD), tf_tracer.trace_batch():
+            predictions = cnn_model.predict(img_batch, verbose=0)[0]
         predicted_class_idx = np.argmax(predictions)
         confidence = float(predictions[predicted_class_idx])
         
@@ -229,12 +352,15 @@ def predict_with_cnn(image, confidence_threshold=CONFIDENCE_THRESHOLD):
             "probabilities": prob_dict,
             "threshold": confidence_threshold
         }
+        if quality is not None:
+            result["quality"] = quality
+        PREDICTION_OUTCOMES.inc(outcome=status)
         
-        print(f"CNN Prediction: {soil_type} ({confidence:.2%} confidence)")
+        logger.info("CNN prediction", extra={"soil_type": soil_type, "confidence": round(confidence, 4)})
         return result
         
     except Exception as e:
-        print(f"Error in CNN prediction: {e}")
+        logger.error(f"Error in CNN prediction: {e}")
         raise ValueError(f"CNN prediction failed: {str(e)}")
 
 # ========================================
@@ -257,34 +383,33 @@ async def upload_image_to_storage(image_data_base64: str, engineer_id: str):
             image_data_base64 = image_data_base64.split(',')[1]
         
         # Decode base64 to bytes
-        image_bytes = base64.b64decode(image_data_base64)
+        with STAGE_LATENCY.time(stage=STAGE_BASE64_DECODE):
+            image_bytes = base64.b64decode(image_data_base64)
         
         # Generate unique filename
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         random_id = str(uuid.uuid4())[:8]
         filename = f"{engineer_id}/{timestamp}_{random_id}.jpg"
         
-        print(f"📸 Uploading image: {filename}")
+        logger.info("Uploading image", extra={"storage_path": filename})
         
         # Upload to Supabase Storage
-        upload_response = supabase.storage.from_('soil_images').upload(
-            path=filename,
-            file=image_bytes,
-            file_options={"content-type": "image/jpeg"}
-        )
+        with STAGE_LATENCY.time(stage=STAGE_STORAGE_UPLOAD):
+            upload_response = supabase.storage.from_('soil_images').upload(
+                path=filename,
+                file=image_bytes,
+                file_options={"content-type": "image/jpeg"}
+            )
         
         # Get public URL
         public_url = supabase.storage.from_('soil_images').get_public_url(filename)
         
-        print(f"✓ Image uploaded successfully")
-        print(f"  URL: {public_url}")
+        logger.info("Image uploaded successfully", extra={"url": public_url})
         
         return public_url
         
     except Exception as e:
-        print(f"❌ Image upload error: {e}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception(f"Image upload error: {e}")
         return None
 
 # ========================================
@@ -303,6 +428,36 @@ class SoilData(BaseModel):
     backend_status: str | None = None
     message: str | None = None
 
+def device_number(data, field):
+    """Numeric ESP32 field: 0 kapag wala (gaya ng dati), None kapag hindi numero."""
+    value = data.get(field, 0)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def check_device_results(data, source):
+    """I-validate ang ESP32 result gamit ang vectorized grain-size engine at i-log ang mismatch."""
+    validation = validate_analysis(data)
+    if not validation["valid"]:
+        GRAIN_SIZE_CHECKS.inc(source=source, result="invalid")
+        logger.warning("ESP32 sent inconsistent weights", extra={
+            "total_weight": data.get("total_weight"),
+            "gravel_weight": data.get("gravel_weight"),
+            "sand_weight": data.get("sand_weight"),
+        })
+    elif validation["mismatches"]:
+        GRAIN_SIZE_CHECKS.inc(source=source, result="corrected")
+        logger.warning("ESP32 results differ from server computation", extra={
+            "mismatches": validation["mismatches"],
+            "device": {field: data.get(field) for field in (*PERCENT_FIELDS, "soil_type")},
+            "computed": validation["computed"],
+        })
+    else:
+        GRAIN_SIZE_CHECKS.inc(source=source, result="ok")
+    return validation
+
 # ----------------------------------------------------
 # A. NEW ENDPOINT: Tumanggap ng Final Data mula sa ESP32
 # ----------------------------------------------------
@@ -319,25 +474,27 @@ async def receive_analysis_from_device(data: SoilData):
         # Dito mo ilalagay ang final save logic mo sa Supabase
         # (Example: Ang data na ito ay maaaring pang-audit o pang-check)
         
-        # Assuming the ESP32 already performed the weight calculation
-        
+        # Hindi na basta pinagkakatiwalaan ang ESP32 computation; server values ang masusunod
+        validation = check_device_results(data.model_dump(), source="receive_analysis")
+        computed = validation["computed"] or {}
+
         result_to_save = {
             "total_weight": data.total_weight,
-            "gravel_percent": data.gravel_percent,
-            "sand_percent": data.sand_percent,
-            "fines_percent": data.fines_percent,
-            "soil_type_uscs": data.soil_type, # Iba ito sa CNN soil type
+            "gravel_percent": computed.get("gravel_percent", data.gravel_percent),
+            "sand_percent": computed.get("sand_percent", data.sand_percent),
+            "fines_percent": computed.get("fines_percent", data.fines_percent),
+            "soil_type_uscs": computed.get("soil_type", data.soil_type), # Iba ito sa CNN soil type
             "device_ip": "ESP32_Device" # Optional identifier
         }
         
         # Example Supabase insertion
         # db_response = supabase.table('audit_analysis_data').insert(result_to_save).execute()
 
-        print(f"✅ Data received from ESP32: Total Weight {data.total_weight}")
+        logger.info("Data received from ESP32", extra={"total_weight": data.total_weight})
 
-        return {"status": "success", "message": "Analysis results saved (audit log)."}
+        return {"status": "success", "message": "Analysis results saved (audit log).", "validation": validation}
     except Exception as e:
-        print(f"Error saving data from ESP32: {e}")
+        logger.error(f"Error saving data from ESP32: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
 
 
@@ -372,38 +529,164 @@ def model_info():
     }
 
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint (stage latencies, outcomes, device errors)"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/image-quality/stats")
+def image_quality_stats():
+    """Rejection rates ng pre-CNN quality gate"""
+    return quality_stats.snapshot()
+
+
+# ========================================
+# Admission Control
+# ========================================
+def _lookup_user_id(token):
+    """Supabase user id ng token ("" kapag invalid), naka-cache nang sandali"""
+    user_id = identity_cache.get(token)
+    if user_id is not None:
+        return user_id
+    try:
+        with STAGE_LATENCY.time(stage=STAGE_SUPABASE_AUTH):
+            user_resp = supabase.auth.get_user(token)
+        user = user_resp.user if hasattr(user_resp, "user") else None
+        user_id = user.id if user else ""
+    except Exception as e:
+        logger.debug(f"Rate limit identity lookup failed: {e}")
+        user_id = ""
+    identity_cache.put(token, user_id)
+    return user_id
+
+
+def _throttled(budget, key, retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    logger.info("Request throttled", extra={"budget": budget, "requester": key, "retry_after": seconds})
+    return HTTPException(
+        status_code=429,
+        detail=f"Too many {budget} requests. Try again in {seconds} s.",
+        headers={"Retry-After": str(seconds)},
+    )
+
+
+async def requester_key(request: Request):
+    """Authenticated user kung may valid na Bearer token, kung wala ay client IP"""
+    ip_key = f"ip:{client_ip(request.headers, request.client.host if request.client else None)}"
+    authorization = request.headers.get("authorization")
+    if authorization and authorization.startswith("Bearer "):
+        token = authorization.split("Bearer ")[1]
+        user_id = identity_cache.get(token)
+        if user_id is None:
+            # Hindi pa kilala ang token: singilin muna ang IP bago tumawag sa Supabase Auth
+            retry_after = await rate_limiter.check(BUDGET_IDENTITY, ip_key)
+            if retry_after:
+                raise _throttled(BUDGET_IDENTITY, ip_key, retry_after)
+            user_id = await asyncio.to_thread(_lookup_user_id, token)
+        if user_id:
+            return f"user:{user_id}"
+    return ip_key
+
+
+def rate_limit(budget):
+    """FastAPI dependency: 429 + Retry-After kapag ubos na ang token bucket ng requester"""
+    async def dependency(request: Request):
+        key = await requester_key(request)
+        retry_after = await rate_limiter.check(budget, key)
+        if retry_after:
+            raise _throttled(budget, key, retry_after)
+        return key
+    return dependency
+
+
+inference_limit = rate_limit(BUDGET_INFERENCE)
+DEVICE_LIMIT = [Depends(rate_limit(BUDGET_DEVICE))]
+ADMIN_LIMIT = [Depends(rate_limit(BUDGET_ADMIN))]
+
+
+def _predict_in_worker(image, confidence_threshold, quality_gate):
+    with follow_thread():
+        return predict_with_cnn(image, confidence_threshold=confidence_threshold, quality_gate=quality_gate)
+
+
+async def run_inference(requester, image, confidence_threshold=CONFIDENCE_THRESHOLD, quality_gate=True):
+    """
+    CNN inference sa pamamagitan ng fair scheduler: limitadong slots,
+    round-robin sa mga requester, at off the event loop ang forward pass.
+    """
+    INFERENCE_QUEUE_DEPTH.inc()
+    start = time.perf_counter()
+    try:
+        await inference_scheduler.acquire(requester)
+    except QueueFull:
+        INFERENCE_QUEUE_DEPTH.dec()
+        ADMISSION_DECISIONS.inc(budget=BUDGET_INFERENCE, result="queue_full")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many inference requests queued. Wait for the current ones to finish.",
+            headers={"Retry-After": "1"},
+        )
+    except BaseException:
+        INFERENCE_QUEUE_DEPTH.dec()
+        raise
+    STAGE_LATENCY.observe(time.perf_counter() - start, stage=STAGE_INFERENCE_QUEUE)
+
+    # Ang slot ay ibinabalik kapag TAPOS na ang worker thread, hindi kapag
+    # na-cancel ang request (hal. client disconnect), para hindi lumampas
+    # sa INFERENCE_CONCURRENCY ang sabay-sabay na forward passes.
+    worker = asyncio.ensure_future(
+        asyncio.to_thread(_predict_in_worker, image, confidence_threshold, quality_gate))
+    worker.add_done_callback(_inference_done)
+    return await asyncio.shield(worker)
+
+
+def _inference_done(worker):
+    inference_scheduler.release()
+    INFERENCE_QUEUE_DEPTH.dec()
+    if not worker.cancelled():
+        # Para walang "exception was never retrieved" kapag na-cancel ang caller
+        worker.exception()
+
+
 @app.post("/predict")
-async def predict_image(data: dict):
+async def predict_image(data: dict, requester: str = Depends(inference_limit)):
     """Predict soil type from base64 encoded image"""
     if cnn_model is None:
         raise HTTPException(status_code=503, detail="CNN model not loaded")
     
     try:
-        image_data = base64.b64decode(data.get('image'))
-        nparr = np.frombuffer(image_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with STAGE_LATENCY.time(stage=STAGE_BASE64_DECODE):
+            image_data = base64.b64decode(data.get('image'))
+        with STAGE_LATENCY.time(stage=STAGE_IMDECODE):
+            nparr = np.frombuffer(image_data, np.uint8)
+            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
         if img is None:
             raise ValueError("Failed to decode image")
         
-        result = predict_with_cnn(img, confidence_threshold=CONFIDENCE_THRESHOLD)
+        result = await run_inference(requester, img, confidence_threshold=CONFIDENCE_THRESHOLD)
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in /predict endpoint: {e}")
+        logger.error(f"Error in /predict endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to process image: {str(e)}")
 
 
 @app.post("/predict-with-threshold")
-async def predict_with_custom_threshold(data: dict):
+async def predict_with_custom_threshold(data: dict, requester: str = Depends(inference_limit)):
     """Predict with custom confidence threshold"""
     if cnn_model is None:
         raise HTTPException(status_code=503, detail="CNN model not loaded")
     
     try:
-        image_data = base64.b64decode(data.get('image'))
-        nparr = np.frombuffer(image_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with STAGE_LATENCY.time(stage=STAGE_BASE64_DECODE):
+            image_data = base64.b64decode(data.get('image'))
+        with STAGE_LATENCY.time(stage=STAGE_IMDECODE):
+            nparr = np.frombuffer(image_data, np.uint8)
+            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
         if img is None:
             raise ValueError("Failed to decode image")
@@ -413,18 +696,20 @@ async def predict_with_custom_threshold(data: dict):
         if not 0.0 <= custom_threshold <= 1.0:
             raise ValueError("Threshold must be between 0.0 and 1.0")
         
-        result = predict_with_cnn(img, confidence_threshold=custom_threshold)
+        result = await run_inference(requester, img, confidence_threshold=custom_threshold)
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in /predict-with-threshold endpoint: {e}")
+        logger.error(f"Error in /predict-with-threshold endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to process image: {str(e)}")
 
 
 # ============================================
 # GET /command - For commands 1, 2, W, R
 # ============================================
-@app.get("/command")
+@app.get("/command", dependencies=DEVICE_LIMIT)
 async def send_command_get(
     input: str,
     authorization: str = Header(None)
@@ -436,29 +721,34 @@ async def send_command_get(
         raise HTTPException(status_code=400, detail="Invalid command for GET request")
 
     try:
-        print(f"📤 Sending command '{input}' to ESP32 at {ESP32_COMMAND_URL}")
+        logger.info("Sending command to ESP32", extra={"command": input, "url": ESP32_COMMAND_URL})
         
-        response_from_esp32 = requests.get(
-            f"{ESP32_COMMAND_URL}?input={input}", 
-            timeout=15
-        )
+        with STAGE_LATENCY.time(stage=STAGE_ESP32_ROUND_TRIP):
+            response_from_esp32 = requests.get(
+                f"{ESP32_COMMAND_URL}?input={input}", 
+                headers={REQUEST_ID_HEADER: request_id_var.get()},
+                timeout=15
+            )
         
+        # HTTP error muna (hal. 500 na HTML page) bago ang content-type check
+        response_from_esp32.raise_for_status()
         content_type = response_from_esp32.headers.get('Content-Type', '')
-        print(f"📥 ESP32 Response Content-Type: {content_type}")
-        print(f"📥 ESP32 Response Status: {response_from_esp32.status_code}")
+        logger.debug("ESP32 response", extra={
+            "content_type": content_type,
+            "status_code": response_from_esp32.status_code,
+        })
         
         if 'application/json' not in content_type:
-            print(f"❌ ESP32 returned non-JSON response!")
-            print(f"First 500 chars: {response_from_esp32.text[:500]}")
+            logger.warning("ESP32 returned non-JSON response", extra={"body_head": response_from_esp32.text[:500]})
+            DEVICE_ERRORS.inc(command=input, error="non_json")
             raise HTTPException(
                 status_code=502,
                 detail=f"ESP32 returned {content_type} instead of JSON."
             )
         
-        response_from_esp32.raise_for_status()
         data = response_from_esp32.json()
         
-        print(f"✅ Received JSON from ESP32: {data}")
+        logger.info("Received JSON from ESP32", extra={"esp32_status": data.get("status")})
         
         response = {
             "status": data.get("status", "unknown"),
@@ -473,23 +763,30 @@ async def send_command_get(
 
         return response
 
+    except HTTPException:
+        raise
+    except requests.exceptions.HTTPError as e:
+        status_code = e.response.status_code if e.response is not None else "unknown"
+        DEVICE_ERRORS.inc(command=input, error=f"http_{status_code}")
+        raise HTTPException(status_code=502, detail=f"ESP32 returned HTTP {status_code}.")
     except requests.exceptions.Timeout:
+        DEVICE_ERRORS.inc(command=input, error="timeout")
         raise HTTPException(status_code=504, detail="ESP32 device timed out.")
     except requests.exceptions.ConnectionError:
+        DEVICE_ERRORS.inc(command=input, error="unreachable")
         raise HTTPException(status_code=503, detail="ESP32 device unreachable.")
     except json.JSONDecodeError:
+        DEVICE_ERRORS.inc(command=input, error="invalid_json")
         raise HTTPException(status_code=500, detail="ESP32 returned invalid JSON.")
     except Exception as e:
-        print(f"Command error: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception(f"Command error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
 # ============================================
 # POST /command - For command 3 (with image data)
 # ============================================
-@app.post("/command")
+@app.post("/command", dependencies=DEVICE_LIMIT)
 async def send_command_post(
     request: CommandRequest,
     authorization: str = Header(None)
@@ -503,28 +800,34 @@ async def send_command_post(
         raise HTTPException(status_code=400, detail="POST only accepts command 3")
 
     try:
-        print(f"📤 Sending command '{input_cmd}' to ESP32 at {ESP32_COMMAND_URL}")
+        logger.info("Sending command to ESP32", extra={"command": input_cmd, "url": ESP32_COMMAND_URL})
         
         # Send command 3 to ESP32
-        response_from_esp32 = requests.get(
-            f"{ESP32_COMMAND_URL}?input={input_cmd}", 
-            timeout=15
-        )
+        with STAGE_LATENCY.time(stage=STAGE_ESP32_ROUND_TRIP):
+            response_from_esp32 = requests.get(
+                f"{ESP32_COMMAND_URL}?input={input_cmd}", 
+                headers={REQUEST_ID_HEADER: request_id_var.get()},
+                timeout=15
+            )
         
+        # HTTP error muna (hal. 500 na HTML page) bago ang content-type check
+        response_from_esp32.raise_for_status()
         content_type = response_from_esp32.headers.get('Content-Type', '')
-        print(f"📥 ESP32 Response Content-Type: {content_type}")
-        print(f"📥 ESP32 Response Status: {response_from_esp32.status_code}")
+        logger.debug("ESP32 response", extra={
+            "content_type": content_type,
+            "status_code": response_from_esp32.status_code,
+        })
         
         if 'application/json' not in content_type:
+            DEVICE_ERRORS.inc(command=input_cmd, error="non_json")
             raise HTTPException(
                 status_code=502,
                 detail=f"ESP32 returned {content_type} instead of JSON."
             )
         
-        response_from_esp32.raise_for_status()
         data = response_from_esp32.json()
         
-        print(f"✅ Received JSON from ESP32: {data}")
+        logger.info("Received JSON from ESP32", extra={"esp32_status": data.get("status")})
         
         response = {
             "status": data.get("status", "unknown"),
@@ -532,12 +835,32 @@ async def send_command_post(
         }
         
         if data["status"] == "results":
-            total_weight = data.get("total_weight", 0)
-            gravel_weight = data.get("gravel_weight", 0)
-            sand_weight = data.get("sand_weight", 0)
-            gravel_percent = data.get("gravel_percent", 0)
-            sand_percent = data.get("sand_percent", 0)
-            fines_percent = data.get("fines_percent", 0)
+            total_weight = device_number(data, "total_weight")
+            gravel_weight = device_number(data, "gravel_weight")
+            sand_weight = device_number(data, "sand_weight")
+            gravel_percent = device_number(data, "gravel_percent")
+            sand_percent = device_number(data, "sand_percent")
+            fines_percent = device_number(data, "fines_percent")
+            soil_type = data.get("soil_type")
+
+            # Server-side recomputation: hindi na basta pinagkakatiwalaan ang ESP32 values.
+            # Kapag inconsistent ang timbang, sine-save pa rin ang device values
+            # (naka-flag sa response at logs) para hindi mawala ang measurement.
+            validation = check_device_results({
+                "total_weight": total_weight,
+                "gravel_weight": gravel_weight,
+                "sand_weight": sand_weight,
+                "gravel_percent": gravel_percent,
+                "sand_percent": sand_percent,
+                "fines_percent": fines_percent,
+                "soil_type": soil_type,
+            }, source="command")
+            if validation["mismatches"]:
+                computed = validation["computed"]
+                gravel_percent = computed["gravel_percent"]
+                sand_percent = computed["sand_percent"]
+                fines_percent = computed["fines_percent"]
+                soil_type = computed["soil_type"]
 
             response.update({
                 "total_weight": total_weight,
@@ -546,41 +869,43 @@ async def send_command_post(
                 "gravel_percent": gravel_percent,
                 "sand_percent": sand_percent,
                 "fines_percent": fines_percent,
-                "soil_type": data["soil_type"],
+                "soil_type": soil_type,
+                "validation": validation,
             })
             
             # --- FINAL SAVE LOGIC ---
-            print("LOG: Starting Command 3 save process...")
+            logger.info("Starting Command 3 save process")
 
             # Authorization Check
             if not authorization or not authorization.startswith("Bearer "):
                 raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
 
             jwt_token = authorization.split("Bearer ")[1]
-            print("LOG: Token extracted, attempting user auth...")
+            logger.debug("Token extracted, attempting user auth")
 
             try:
-                user_response = supabase.auth.get_user(jwt_token)
+                with STAGE_LATENCY.time(stage=STAGE_SUPABASE_AUTH):
+                    user_response = supabase.auth.get_user(jwt_token)
                 
                 if not user_response.user:
                     raise HTTPException(status_code=401, detail="Invalid token")
                 
                 engineer_id = user_response.user.id
-                print(f"LOG: User authenticated: {engineer_id}")
+                logger.info("User authenticated", extra={"engineer_id": engineer_id})
 
             except Exception as auth_error:
-                print(f"Supabase Auth Error: {auth_error}")
+                logger.warning(f"Supabase Auth Error: {auth_error}")
                 raise HTTPException(status_code=401, detail="Authentication failed.")
 
             # Upload image
             image_url = None
             if request.image_data:
-                print("LOG: Image data found, starting upload...")
+                logger.debug("Image data found, starting upload")
                 try:
                     image_url = await upload_image_to_storage(request.image_data, engineer_id)
-                    print(f"LOG: Image upload complete. URL: {image_url}")
+                    logger.info("Image upload complete", extra={"url": image_url})
                 except Exception as upload_error:
-                    print(f"Supabase Storage Upload Error: {upload_error}")
+                    logger.error(f"Supabase Storage Upload Error: {upload_error}")
                     raise HTTPException(status_code=500, detail="Failed to upload image.")
             
             # Save results to database
@@ -593,31 +918,42 @@ async def send_command_post(
                 "gravel_percent": gravel_percent,
                 "sand_percent": sand_percent,
                 "fines_percent": fines_percent,
-                "soil_type": data["soil_type"],
+                "soil_type": soil_type,
                 "predicted_soil_type": request.image_soil_type or "Not provided",
                 "image_soil_type": image_url or "Not provided",
                 "status": "PENDING"
             }
             
-            db_response = supabase.table('soil_analysis_results').insert(result).execute()
-            print(f"✓ Data saved to database")
+            with STAGE_LATENCY.time(stage=STAGE_DB_INSERT):
+                db_response = supabase.table('soil_analysis_results').insert(result).execute()
+            logger.info("Data saved to database")
+            dashboard_stats.record_insert(db_response.data[0] if db_response.data else result)
             
             response["save_status"] = "Results saved to database!"
+            if not validation["valid"]:
+                response["save_status"] = "Results saved, but the weights are inconsistent and need review."
             if image_url:
                 response["image_url"] = image_url
 
         return response
 
+    except HTTPException:
+        raise
+    except requests.exceptions.HTTPError as e:
+        status_code = e.response.status_code if e.response is not None else "unknown"
+        DEVICE_ERRORS.inc(command=input_cmd, error=f"http_{status_code}")
+        raise HTTPException(status_code=502, detail=f"ESP32 returned HTTP {status_code}.")
     except requests.exceptions.Timeout:
+        DEVICE_ERRORS.inc(command=input_cmd, error="timeout")
         raise HTTPException(status_code=504, detail="ESP32 device timed out.")
     except requests.exceptions.ConnectionError:
+        DEVICE_ERRORS.inc(command=input_cmd, error="unreachable")
         raise HTTPException(status_code=503, detail="ESP32 device unreachable.")
     except json.JSONDecodeError:
+        DEVICE_ERRORS.inc(command=input_cmd, error="invalid_json")
         raise HTTPException(status_code=500, detail="ESP32 returned invalid JSON.")
     except Exception as e:
-        print(f"Command error: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception(f"Command error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
@@ -653,16 +989,19 @@ def health_check():
 
 
 @app.post("/test-prediction")
-async def test_prediction():
+async def test_prediction(requester: str = Depends(inference_limit)):
     """Test endpoint with sample data"""
     test_img = np.ones((128, 128, 3), dtype=np.uint8) * [139, 69, 19]
     
     try:
-        result = predict_with_cnn(test_img, confidence_threshold=CONFIDENCE_THRESHOLD)
+        # Flat synthetic image ito, kaya i-bypass ang quality gate
+        result = await run_inference(requester, test_img, confidence_threshold=CONFIDENCE_THRESHOLD, quality_gate=False)
         return {
             "message": "Test prediction successful",
             "result": result
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Test failed: {str(e)}")
 
@@ -691,7 +1030,47 @@ async def test_upload(data: dict):
 # ========================================
 
 
-@app.post("/admin/delete-user")
+def get_requester(authorization: str):
+    """Ibinabalik ang (user, role) ng may-ari ng Bearer token"""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing Authorization header")
+    jwt_token = authorization.split("Bearer ")[1]
+
+    try:
+        with STAGE_LATENCY.time(stage=STAGE_SUPABASE_AUTH):
+            user_resp = supabase.auth.get_user(jwt_token)
+        requester = user_resp.user if hasattr(user_resp, "user") else None
+    except Exception as e:
+        logger.warning(f"Failed to validate requester: {e}")
+        raise HTTPException(status_code=401, detail="Failed to validate requester")
+    if not requester:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    identity_cache.put(jwt_token, requester.id)
+
+    try:
+        profile_q = supabase.table('profiles').select('role').eq('id', requester.id).single().execute()
+        profile_data = profile_q.data if hasattr(profile_q, "data") else None
+    except Exception as e:
+        logger.error(f"Failed to verify requester role: {e}")
+        raise HTTPException(status_code=500, detail="Failed to verify requester role")
+
+    return requester, (profile_data or {}).get("role")
+
+
+def require_role(authorization: str, *roles):
+    """HTTPException 403 kung wala sa `roles` ang role ng requester"""
+    requester, role = get_requester(authorization)
+    if role not in roles:
+        raise HTTPException(status_code=403, detail=f"{'/'.join(roles).capitalize()} access required")
+    return requester, role
+
+
+def verify_admin(authorization: str):
+    """Ibinabalik ang admin user; HTTPException kung hindi admin"""
+    return require_role(authorization, "admin")[0]
+
+
+@app.post("/admin/delete-user", dependencies=ADMIN_LIMIT)
 async def admin_delete_user(payload: dict, authorization: str = Header(None)):
     """Delete user (admin only) - deletes both profile and authentication user"""
     user_id_to_delete = payload.get("id")
@@ -714,7 +1093,7 @@ async def admin_delete_user(payload: dict, authorization: str = Header(None)):
         if not requester:
             raise HTTPException(status_code=401, detail="Invalid token")
     except Exception as e:
-        print(f"Failed to validate requester: {e}")
+        logger.warning(f"Failed to validate requester: {e}")
         raise HTTPException(status_code=401, detail="Failed to validate requester")
 
     # Check if requester is admin
@@ -731,7 +1110,7 @@ async def admin_delete_user(payload: dict, authorization: str = Header(None)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Failed to verify requester role: {e}")
+        logger.error(f"Failed to verify requester role: {e}")
         raise HTTPException(status_code=500, detail="Failed to verify requester role")
 
     # Prevent self-deletion
@@ -753,21 +1132,20 @@ async def admin_delete_user(payload: dict, authorization: str = Header(None)):
     # Delete from profiles table
     try:
         supabase.table('profiles').delete().eq('id', user_id_to_delete).execute()
-        print(f"✓ Profile deleted for user: {user_id_to_delete}")
+        logger.info("Profile deleted", extra={"user_id": user_id_to_delete})
     except Exception as e:
-        print(f"Failed to delete profile: {e}")
+        logger.error(f"Failed to delete profile: {e}")
         raise HTTPException(status_code=500, detail=f"Failed deleting profile: {str(e)}")
 
     # Delete authentication user using Supabase Admin API
     try:
         # IMPORTANTE: Gamitin ang admin.delete_user() method
         delete_response = supabase.auth.admin.delete_user(user_id_to_delete)
-        print(f"✓ Authentication user deleted: {user_id_to_delete}")
-        print(f"  Delete response: {delete_response}")
+        logger.info("Authentication user deleted", extra={"user_id": user_id_to_delete})
         
     except Exception as e:
         error_msg = str(e)
-        print(f"❌ Failed to delete authentication user: {error_msg}")
+        logger.error(f"Failed to delete authentication user: {error_msg}")
         
         # Even if auth deletion fails, profile is already deleted
         # Return partial success with warning
@@ -784,6 +1162,311 @@ async def admin_delete_user(payload: dict, authorization: str = Header(None)):
         "user_id": user_id_to_delete
     }
 
+# ========================================
+# Dashboard Statistics
+# ========================================
+# Pre-aggregated counters para hindi na i-download ng dashboards ang buong table
+STATS_RECONCILE_SECONDS = float(os.environ.get("STATS_RECONCILE_SECONDS", "300"))
+STATS_LOADING_RETRY_SECONDS = 3  # Retry-After habang wala pang unang reconciliation
+REVIEW_STATUSES = ("PENDING", "APPROVED", "DISAPPROVED")
+
+
+def reconcile_dashboard_stats():
+    """Buuin muli ang counters mula sa soil_analysis_results (keyset paging)"""
+    start = time.perf_counter()
+    rows = dashboard_stats.rebuild(iter_analysis_rows(supabase))
+    logger.info("Dashboard stats reconciled", extra={
+        "rows": rows,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    })
+    return rows
+
+
+async def dashboard_stats_reconcile_loop():
+    while True:
+        try:
+            await asyncio.to_thread(reconcile_dashboard_stats)
+        except Exception as e:
+            logger.error(f"Dashboard stats reconciliation failed: {e}")
+        await asyncio.sleep(STATS_RECONCILE_SECONDS)
+
+
+@app.get("/dashboard/stats")
+def get_dashboard_stats(engineer_id: Optional[str] = None, authorization: str = Header(None)):
+    """
+    Counts per status, USCS soil type, CNN prediction at araw.
+    Engineers ay sariling stats lang; experts/admins ay global o kahit sinong engineer.
+    """
+    requester, role = require_role(authorization, "engineer", "expert", "admin")
+    if role == "engineer":
+        engineer_id = requester.id
+    if dashboard_stats.last_reconciled_at is None:
+        # Puro zero pa ang counters hanggang matapos ang unang reconciliation
+        raise HTTPException(status_code=503, detail="Dashboard stats are still loading",
+                            headers={"Retry-After": str(STATS_LOADING_RETRY_SECONDS)})
+    return dashboard_stats.snapshot(engineer_id)
+
+
+@app.post("/analysis/{analysis_id}/status")
+def update_analysis_status(analysis_id: str, payload: dict, authorization: str = Header(None)):
+    """I-update ang review status (expert/admin) at ang dashboard counters"""
+    require_role(authorization, "expert", "admin")
+    new_status = str(payload.get("status") or "").upper()
+    if new_status not in REVIEW_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Status must be one of {', '.join(REVIEW_STATUSES)}")
+
+    try:
+        current = supabase.table('soil_analysis_results').select(STATS_COLUMNS).eq('id', analysis_id).execute()
+    except Exception as e:
+        logger.error(f"Failed to load analysis {analysis_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load analysis")
+    if not current.data:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    row = current.data[0]
+
+    try:
+        supabase.table('soil_analysis_results').update({"status": new_status}).eq('id', analysis_id).execute()
+    except Exception as e:
+        logger.error(f"Failed to update status for analysis {analysis_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update status")
+
+    dashboard_stats.record_status_change(row, new_status)
+    return {"status": "success", "id": row.get("id"), "analysis_status": new_status}
+
+
+# Mga status na puwedeng burahin ng engineer sa sariling history
+ENGINEER_DELETABLE_STATUSES = ("PENDING", "DISAPPROVED")
+
+
+@app.delete("/analysis/{analysis_id}")
+def delete_analysis(analysis_id: str, authorization: str = Header(None)):
+    """
+    Burahin ang analysis (at ang reviews nito) at ibawas sa dashboard counters.
+    Engineers: sariling pending/disapproved lang; admins: kahit alin.
+    """
+    requester, role = require_role(authorization, "engineer", "admin")
+
+    try:
+        current = supabase.table('soil_analysis_results').select(STATS_COLUMNS).eq('id', analysis_id).execute()
+    except Exception as e:
+        logger.error(f"Failed to load analysis {analysis_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load analysis")
+    row = current.data[0] if current.data else None
+    if row is None or (role == "engineer" and row.get("engineer_id") != requester.id):
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    if role == "engineer" and normalize_status(row.get("status")) not in ENGINEER_DELETABLE_STATUSES:
+        raise HTTPException(status_code=409, detail="Only pending or disapproved analyses can be deleted")
+
+    try:
+        supabase.table('analysis_reviews').delete().eq('analysis_id', analysis_id).execute()
+        supabase.table('soil_analysis_results').delete().eq('id', analysis_id).execute()
+    except Exception as e:
+        logger.error(f"Failed to delete analysis {analysis_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to delete analysis")
+
+    dashboard_stats.record_delete(row)
+    logger.info("Analysis deleted", extra={"analysis_id": analysis_id, "role": role})
+    return {"status": "success", "id": row.get("id")}
+
+
+@app.post("/admin/dashboard-stats/reconcile", dependencies=ADMIN_LIMIT)
+async def trigger_dashboard_stats_reconcile(authorization: str = Header(None)):
+    """Agarang rebuild ng dashboard counters (admin lang)"""
+    verify_admin(authorization)
+    try:
+        rows = await asyncio.to_thread(reconcile_dashboard_stats)
+    except Exception as e:
+        logger.error(f"Dashboard stats reconciliation failed: {e}")
+        raise HTTPException(status_code=500, detail="Reconciliation failed")
+    return {"status": "success", "rows": rows, "last_reconciled_at": dashboard_stats.last_reconciled_at}
+
+
+@app.post("/admin/grain-size/recompute", dependencies=ADMIN_LIMIT)
+async def recompute_grain_size(apply: bool = False, authorization: str = Header(None)):
+    """
+    I-recompute ang percentages at USCS soil type ng lahat ng stored results (admin lang).
+    Dry run by default; apply=true para isulat ang mga pagbabago.
+    """
+    verify_admin(authorization)
+
+    def run():
+        pages = iter_pages(supabase, GRAIN_SIZE_COLUMNS, page_size=EXPORT_PAGE_SIZE * 5)
+        summary = recompute_stored_results(supabase, pages, apply=apply)
+        if apply and summary["updated"]:
+            reconcile_dashboard_stats()
+        return summary
+
+    start = time.perf_counter()
+    try:
+        summary = await asyncio.to_thread(run)
+    except Exception as e:
+        logger.error(f"Grain-size recomputation failed: {e}")
+        raise HTTPException(status_code=500, detail="Recomputation failed")
+    summary["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("Grain-size recomputation finished", extra={
+        "apply": apply,
+        "rows": summary["rows"],
+        "updated": summary["updated"],
+    })
+    return {"status": "success", "applied": apply, **summary}
+
+
+@app.get("/admin/admission", dependencies=ADMIN_LIMIT)
+def admission_status(authorization: str = Header(None)):
+    """Rate limit budgets at estado ng fair inference queue (admin lang)"""
+    verify_admin(authorization)
+    return {
+        "rate_limits": rate_limiter.status(),
+        "inference_queue": inference_scheduler.status(),
+    }
+
+
+# ========================================
+# Analysis Results Export
+# ========================================
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _logged_export(chunks, stats, export_format):
+    """Ini-log ang kabuuang rows/tagal kapag tapos (o naputol) ang stream."""
+    start = time.perf_counter()
+    completed = False
+    try:
+        for chunk in chunks:
+            yield chunk
+        completed = True
+    except Exception as e:
+        # Naka-send na ang headers; puputulin na lang ang response
+        logger.error(f"Export failed after {stats['rows']} rows: {e}")
+        raise
+    finally:
+        logger.info("Export finished", extra={
+            "format": export_format,
+            "rows": stats["rows"],
+            "completed": completed,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        })
+
+
+@app.get("/export/analysis-results")
+def export_analysis_results(
+    format: str = "csv",
+    engineer_id: Optional[str] = None,
+    status: Optional[str] = None,
+    soil_type: Optional[str] = None,
+    search: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    page_size: int = EXPORT_PAGE_SIZE,
+    authorization: str = Header(None),
+):
+    """
+    Streaming export ng soil_analysis_results (CSV o Parquet).
+    Page by page ang basa sa Supabase at sulat sa response, kaya constant ang
+    memory kahit ilang libong rows. Engineers ay sariling results lang.
+    """
+    requester, role = require_role(authorization, "engineer", "expert", "admin")
+    if role == "engineer":
+        engineer_id = requester.id
+
+    export_format = format.lower()
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Format must be 'csv' or 'parquet'")
+    if export_format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow on the server")
+    if status and status.upper() not in REVIEW_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Status must be one of {', '.join(REVIEW_STATUSES)}")
+    for value in (date_from, date_to):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+    page_size = max(1, min(page_size, EXPORT_PAGE_SIZE * 5))
+
+    filters = {
+        "engineer_id": engineer_id,
+        "status": status,
+        "soil_type": soil_type,
+        "search": search,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+    pages = iter_pages(supabase, ", ".join(EXPORT_COLUMNS), filters, page_size)
+    stats = {"rows": 0}
+    writer = stream_parquet if export_format == "parquet" else stream_csv
+
+    filename = f"soil_analysis_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    return StreamingResponse(
+        _logged_export(writer(pages, stats), stats, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# ========================================
+# Admin Profiling Endpoints
+# ========================================
+
+
+@app.get("/admin/profiling", dependencies=ADMIN_LIMIT)
+def profiling_status(authorization: str = Header(None)):
+    """Profiler settings at listahan ng naka-save na profiles"""
+    verify_admin(authorization)
+    return {
+        "requests": request_profiler.status(),
+        "tensorflow": tf_tracer.status(),
+        "profiles": list_profiles(),
+    }
+
+
+@app.post("/admin/profiling/config", dependencies=ADMIN_LIMIT)
+def profiling_config(payload: dict, authorization: str = Header(None)):
+    """I-set ang fraction ng requests na sina-sample (0.0 - 1.0)"""
+    verify_admin(authorization)
+    try:
+        request_profiler.set_sample_rate(float(payload.get("sample_rate", 0.0)))
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return request_profiler.status()
+
+
+@app.post("/admin/profiling/tf-trace", dependencies=ADMIN_LIMIT)
+def profiling_tf_trace(payload: dict, authorization: str = Header(None)):
+    """I-trace ang susunod na N inference batches (TensorBoard profile)"""
+    verify_admin(authorization)
+    try:
+        logdir = tf_tracer.arm(int(payload.get("batches", 1)))
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except OSError as e:
+        raise HTTPException(status_code=400, detail=f"Cannot create trace directory: {e}")
+    return {"status": "armed", "logdir": logdir}
+
+
+@app.delete("/admin/profiling/tf-trace", dependencies=ADMIN_LIMIT)
+def profiling_tf_trace_disarm(authorization: str = Header(None)):
+    """I-disarm o itigil ang TensorFlow trace"""
+    verify_admin(authorization)
+    was_armed = tf_tracer.disarm()
+    return {"status": "disarmed" if was_armed else "idle", "tensorflow": tf_tracer.status()}
+
+
+@app.get("/admin/profiling/profiles/{name}", dependencies=ADMIN_LIMIT)
+def profiling_download(name: str, authorization: str = Header(None)):
+    """I-download ang isang .folded profile"""
+    verify_admin(authorization)
+    path = resolve_profile(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+
 # ========================================
 # Startup Event
 # ========================================
@@ -795,20 +1478,18 @@ async def startup_event():
     # ⚠️ Tiyakin na NA-LOAD NA ang model BAGO DITO! 
     # Inalis na ang load_model() call dahil tinawag na ito sa global scope
     
+    # Initial build + periodic reconciliation ng dashboard counters
+    if supabase:
+        app.state.stats_reconcile_task = asyncio.create_task(dashboard_stats_reconcile_loop())
+
     # ------------------
-    # Startup Printout
+    # Startup Summary
     # ------------------
-    print("\n" + "=" * 60)
-    print("GEOTECH SOIL ANALYSIS BACKEND - STARTUP")
-    print("=" * 60)
-    print(f"Model: CNN (Convolutional Neural Network)")
-    print(f"Framework: TensorFlow/Keras")
-    # Gamitin ang cnn_status variable
-    print(f"Status: {'✓ Loaded' if cnn_status == 'loaded' else f'✗ {cnn_status}'}") 
-    print(f"Confidence Threshold: {CONFIDENCE_THRESHOLD}")
-    print(f"Classes: {CLASSES}")
-    print(f"Device Comm: Wi-Fi HTTP Relay")
-    # ... (Iba pang print statements)
-    print("=" * 60)
-    print("Backend ready to accept requests")
-    print("=" * 60 + "\n")
\ No newline at end of file
+    logger.info("Geotech soil analysis backend ready to accept requests", extra={
+        "model": "CNN (Convolutional Neural Network)",
+        "framework": "TensorFlow/Keras",
+        "cnn_status": cnn_status,
+        "confidence_threshold": CONFIDENCE_THRESHOLD,
+        "classes": CLASSES,
+        "device_comm": "Wi-Fi HTTP Relay",
+    })
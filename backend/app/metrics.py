@@ -0,0 +1,265 @@
+# ========================================
+# Prometheus-style Metrics (in-process)
+# ========================================
+# Magaan na registry para sa counters, gauges at histograms.
+# Walang dagdag na dependency; ang GET /metrics ay nagre-render ng
+# Prometheus text exposition format (version 0.0.4).
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets (seconds) - mula sub-ms (decode) hanggang 15s (ESP32 timeout)
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0,
+)
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0.0)
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount=1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket_counts (non-cumulative, +1 para sa +Inf), sum, count]
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[key] = series
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ========================================
+# Application Metrics
+# ========================================
+# Stage names para sa STAGE_LATENCY
+STAGE_BASE64_DECODE = "base64_decode"
+STAGE_IMDECODE = "imdecode"
+STAGE_PREPROCESS = "preprocess"
+STAGE_QUALITY_GATE = "quality_gate"
+STAGE_MODEL_FORWARD = "model_forward"
+STAGE_SUPABASE_AUTH = "supabase_auth"
+STAGE_STORAGE_UPLOAD = "storage_upload"
+STAGE_DB_INSERT = "db_insert"
+STAGE_ESP32_ROUND_TRIP = "esp32_round_trip"
+STAGE_INFERENCE_QUEUE = "inference_queue_wait"
+
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "geotech_stage_duration_seconds",
+    "Latency ng bawat stage sa request path.",
+    ["stage"],
+))
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "geotech_http_request_duration_seconds",
+    "End-to-end HTTP request latency per route.",
+    ["method", "route", "status"],
+))
+
+PREDICTION_OUTCOMES = REGISTRY.register(Counter(
+    "geotech_prediction_outcomes_total",
+    "CNN prediction outcomes (confident, uncertain, rejected).",
+    ["outcome"],
+))
+
+IMAGE_QUALITY_RESULTS = REGISTRY.register(Counter(
+    "geotech_image_quality_checks_total",
+    "Resulta ng pre-CNN image quality gate.",
+    ["status"],
+))
+
+IMAGE_QUALITY_REASONS = REGISTRY.register(Counter(
+    "geotech_image_quality_reasons_total",
+    "Mga dahilan ng reject/flag sa image quality gate.",
+    ["reason"],
+))
+
+INFERENCE_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "geotech_inference_queue_depth",
+    "Bilang ng CNN inference na kasalukuyang naghihintay o tumatakbo.",
+))
+
+DEVICE_ERRORS = REGISTRY.register(Counter(
+    "geotech_device_errors_total",
+    "ESP32 relay errors ayon sa uri.",
+    ["command", "error"],
+))
+
+ADMISSION_DECISIONS = REGISTRY.register(Counter(
+    "geotech_admission_decisions_total",
+    "Rate limit at inference queue decisions ayon sa budget (admitted, throttled, queue_full).",
+    ["budget", "result"],
+))
+
+GRAIN_SIZE_CHECKS = REGISTRY.register(Counter(
+    "geotech_grain_size_checks_total",
+    "Server-side validation ng ESP32 percentages at USCS soil type (ok, corrected, invalid).",
+    ["source", "result"],
+))
+
+
+def render_metrics():
+    """Prometheus text exposition ng lahat ng registered metrics."""
+    return REGISTRY.render()
@@ -0,0 +1,324 @@
+# ========================================
+# On-demand Profiling
+# ========================================
+# Tatlong paraan para makita kung saan napupunta ang oras sa production:
+#   1. Sampled requests  - PROFILE_SAMPLE_RATE na fraction ng requests ay
+#                          sina-sample ng StackSampler (statistical, ~10ms interval)
+#   2. Single request    - kapag may X-Profile header (admin lang), 1ms interval
+#   3. TensorFlow trace  - op-level trace ng susunod na N inference batches
+#
+# Ang output ay nasa PROFILE_DIR:
+#   *.folded  - collapsed stacks ("a;b;c 42"), diretsong magagamit sa
+#               flamegraph.pl, speedscope, o inferno
+#   tf_*/     - TensorBoard profile logdir (tensorboard --logdir <dir>)
+import contextvars
+import os
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from app.logging_config import get_logger
+
+logger = get_logger("profiling")
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_DIR = Path(os.environ.get(
+    "PROFILE_DIR",
+    Path(__file__).resolve().parent.parent / "profiles",
+))
+SAMPLED_INTERVAL = 0.01   # 10ms para sa background sampling (mababang overhead)
+HEADER_INTERVAL = 0.001   # 1ms para sa explicit na single-request capture
+MAX_STACK_DEPTH = 128
+MAX_PROFILE_FILES = 200   # pinakaluma ang binubura kapag lumampas
+
+# Iisang writer thread para sa .folded files at pruning, para walang
+# file I/O sa event loop (at hindi nag-uunahan ang dalawang _prune)
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-writer")
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _safe(value):
+    return _SAFE_NAME.sub("_", value).strip("_") or "root"
+
+
+# ========================================
+# Statistical Stack Sampler
+# ========================================
+class StackSampler:
+    """
+    Background thread na kumukuha ng stack ng isang thread bawat `interval`.
+
+    Walang tracing hook sa target thread, kaya halos walang overhead sa
+    request mismo. Dahil event loop thread ang sina-sample, kasama rin sa
+    profile ang ibang coroutines na tumakbo sa parehong oras. Ang worker
+    threads ng request (hal. CNN inference) ay sinasama gamit ang follow().
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_ids = {thread_id}
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def follow(self, thread_id):
+        self.thread_ids.add(thread_id)
+
+    def unfollow(self, thread_id):
+        self.thread_ids.discard(thread_id)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.thread_ids):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[";".join(stack)] += 1
+                self.samples += 1
+
+
+# Sampler ng kasalukuyang request (nakikita rin sa asyncio.to_thread workers)
+active_sampler_var = contextvars.ContextVar("active_sampler", default=None)
+
+
+@contextmanager
+def follow_thread():
+    """Isama ang kasalukuyang worker thread sa profile ng request, kung mayroon."""
+    sampler = active_sampler_var.get()
+    if sampler is None:
+        yield
+        return
+    thread_id = threading.get_ident()
+    sampler.follow(thread_id)
+    try:
+        yield
+    finally:
+        sampler.unfollow(thread_id)
+
+
+def write_folded(stacks, name):
+    """I-save ang collapsed stacks; ibinabalik ang path."""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"{name}.folded"
+    with open(path, "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    _prune()
+    return path
+
+
+# ========================================
+# Request Profiler
+# ========================================
+class RequestProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "0") or 0)
+        self.profiles_written = 0
+
+    def set_sample_rate(self, rate):
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("sample_rate must be between 0.0 and 1.0")
+        self.sample_rate = rate
+
+    def choose_interval(self, explicit):
+        """Ibinabalik ang sampling interval, o None kung hindi ipo-profile."""
+        if explicit:
+            return HEADER_INTERVAL
+        rate = self.sample_rate
+        if rate > 0.0 and random.random() < rate:
+            return SAMPLED_INTERVAL
+        return None
+
+    @contextmanager
+    def profile(self, interval, route, request_id, mode):
+        sampler = StackSampler(threading.get_ident(), interval).start()
+        token = active_sampler_var.set(sampler)
+        start = time.perf_counter()
+        try:
+            yield sampler
+        finally:
+            active_sampler_var.reset(token)
+            stacks = sampler.stop()
+            elapsed_ms = int((time.perf_counter() - start) * 1000)
+            if stacks:
+                stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                name = f"{stamp}_{mode}_{_safe(route)}_{elapsed_ms}ms_{_safe(request_id)}"
+                _writer.submit(self._save, stacks, name)
+
+    def _save(self, stacks, name):
+        try:
+            write_folded(stacks, name)
+        except OSError as e:
+            logger.error(f"Failed to write profile {name}: {e}")
+            return
+        with self._lock:
+            self.profiles_written += 1
+
+    def status(self):
+        return {
+            "sample_rate": self.sample_rate,
+            "profiles_written": self.profiles_written,
+            "profile_dir": str(PROFILE_DIR),
+            "header": PROFILE_HEADER,
+        }
+
+
+# ========================================
+# TensorFlow Op-level Trace
+# ========================================
+class TFTraceController:
+    """
+    I-arm para i-trace ang susunod na N inference batches gamit ang
+    tf.profiler. Kapag hindi naka-arm, isang attribute check lang ang cost.
+    Hindi dapat makasira ng inference ang profiler: kapag pumalya ang
+    start/stop, nilo-log lang at dina-disarm ang trace.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.remaining = 0
+        self.active = False
+        self.logdir = None
+
+    def arm(self, batches):
+        if batches < 1:
+            raise ValueError("batches must be at least 1")
+        with self._lock:
+            if self.remaining or self.active:
+                raise RuntimeError("A TensorFlow trace is already armed or running")
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            logdir = PROFILE_DIR / f"tf_{stamp}_{batches}batches"
+            # Dito na ginagawa ang logdir para sa admin bumalik ang error, hindi sa inference
+            logdir.mkdir(parents=True, exist_ok=True)
+            if not os.access(logdir, os.W_OK):
+                raise PermissionError(f"Trace directory {logdir} is not writable")
+            self.logdir = logdir
+            self.remaining = batches
+        return str(self.logdir)
+
+    def disarm(self):
+        """Itigil ang naka-arm o tumatakbong trace; True kung may na-disarm."""
+        with self._lock:
+            was_armed = bool(self.remaining or self.active)
+            if self.active:
+                import tensorflow as tf
+
+                self._stop(tf)
+            self.remaining = 0
+        return was_armed
+
+    def _stop(self, tf):
+        # Tawagin habang hawak ang self._lock
+        try:
+            tf.profiler.experimental.stop()
+        except Exception as e:
+            logger.error(f"Failed to stop TensorFlow trace: {e}")
+        self.active = False
+        self.remaining = 0
+        _writer.submit(_prune)
+
+    @contextmanager
+    def trace_batch(self):
+        if not self.remaining:
+            yield
+            return
+
+        import tensorflow as tf
+
+        with self._lock:
+            if self.remaining and not self.active:
+                try:
+                    self.logdir.mkdir(parents=True, exist_ok=True)
+                    tf.profiler.experimental.start(str(self.logdir))
+                    self.active = True
+                except Exception as e:
+                    logger.error(f"Failed to start TensorFlow trace; disarming: {e}")
+                    self.remaining = 0
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self.active:
+                    self.remaining -= 1
+                    if self.remaining <= 0:
+                        self._stop(tf)
+
+    def status(self):
+        return {
+            "armed_batches_remaining": self.remaining,
+            "active": self.active,
+            "logdir": str(self.logdir) if self.logdir else None,
+        }
+
+
+# ========================================
+# Profile Listing
+# ========================================
+def _entry_size(path):
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+
+def list_profiles():
+    if not PROFILE_DIR.exists():
+        return []
+    entries = []
+    for path in sorted(PROFILE_DIR.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True):
+        entries.append({
+            "name": path.name,
+            "kind": "tensorflow_trace" if path.is_dir() else "folded_stacks",
+            "size_bytes": _entry_size(path),
+            "created": datetime.fromtimestamp(path.stat().st_mtime).isoformat(),
+        })
+    return entries
+
+
+def resolve_profile(name):
+    """Ligtas na path ng isang .folded profile (walang path traversal)."""
+    path = (PROFILE_DIR / name).resolve()
+    if path.parent != PROFILE_DIR.resolve() or not path.is_file():
+        return None
+    return path
+
+
+def _prune():
+    if not PROFILE_DIR.exists():
+        return
+    entries = sorted(PROFILE_DIR.iterdir(), key=lambda p: p.stat().st_mtime)
+    for path in entries[:max(0, len(entries) - MAX_PROFILE_FILES)]:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
+
+request_profiler = RequestProfiler()
+tf_tracer = TFTraceController()
@@ -0,0 +1,93 @@
+# ========================================
+# Benchmark Comparison
+# ========================================
+# I-compare ang dalawang bench/results/*.json (hal. bago at pagkatapos ng
+# isang commit). Exit code 1 kapag may regression na lampas sa threshold.
+#
+#   python -m bench.compare                       # dalawang pinakabagong results
+#   python -m bench.compare base.json new.json --threshold 0.15
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from bench.run import RESULTS_DIR
+
+# (path sa scenario dict, mas mataas ba ang mas maganda)
+METRICS = (
+    (("latency_ms", "p50"), False),
+    (("latency_ms", "p95"), False),
+    (("latency_ms", "p99"), False),
+    (("throughput_rps",), True),
+    (("memory", "server_rss_peak_mb"), False),
+    (("errors",), False),
+)
+
+
+def _get(data, path):
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def compare(base, new, threshold):
+    rows = []
+    regressions = 0
+    for name in sorted(set(base["scenarios"]) & set(new["scenarios"])):
+        for path, higher_is_better in METRICS:
+            old_value = _get(base["scenarios"][name], path)
+            new_value = _get(new["scenarios"][name], path)
+            if old_value is None or new_value is None:
+                continue
+            if old_value:
+                change = (new_value - old_value) / old_value
+            else:
+                change = 0.0 if not new_value else float("inf")
+            worse = -change if higher_is_better else change
+            regressed = worse > threshold
+            regressions += regressed
+            rows.append((name, ".".join(path), old_value, new_value, change, regressed))
+    return rows, regressions
+
+
+def _latest_two():
+    files = sorted(RESULTS_DIR.glob("*.json"))
+    if len(files) < 2:
+        sys.exit("Need at least two result files in bench/results/ to compare")
+    return files[-2], files[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base", nargs="?")
+    parser.add_argument("new", nargs="?")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change treated as a regression (default 0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.base and args.new:
+        base_path, new_path = Path(args.base), Path(args.new)
+    else:
+        base_path, new_path = _latest_two()
+
+    base = json.loads(base_path.read_text())
+    new = json.loads(new_path.read_text())
+    print(f"base: {base_path.name} ({base['meta'].get('git_sha')})")
+    print(f"new:  {new_path.name} ({new['meta'].get('git_sha')})\n")
+
+    rows, regressions = compare(base, new, args.threshold)
+    print(f"{'scenario':<16}{'metric':<30}{'base':>12}{'new':>12}{'change':>10}")
+    for name, metric, old_value, new_value, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<16}{metric:<30}{old_value:>12.2f}{new_value:>12.2f}{change:>+10.1%}{flag}")
+
+    if regressions:
+        print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# ========================================
+# Simulated ESP32 (bench stand-in)
+# ========================================
+# Sinusunod ang /command?input=1|2|W|R|3 JSON protocol ng totoong device:
+#   1 - total weight (unwashed sample)    -> {"status": "total_weight", "value": ...}
+#   2 - gravel weight (retained)          -> {"status": "gravel_weight", "value": ...}
+#   W - live weight check                 -> {"status": "weight_check", "value": ...}
+#   3 - sand weight + computed results    -> {"status": "results", ...percents, soil_type}
+#   R - reset                             -> {"status": "reset", "message": ...}
+#
+# May configurable na delay (base + jitter) at faults para ma-exercise ang
+# timeout/unreachable/non-JSON handling ng backend.
+#
+#   python -m bench.fake_esp32 --port 8081 --delay-ms 120 --jitter-ms 40 --fault-rate 0.02
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FAULT_MODES = ("timeout", "html", "http_500", "drop", "invalid_json")
+
+
+@dataclass
+class ESP32Config:
+    delay_ms: float = 0.0
+    jitter_ms: float = 0.0
+    fault_rate: float = 0.0
+    fault_modes: tuple = FAULT_MODES
+    timeout_s: float = 16.0  # lampas sa 15s timeout ng backend
+    seed: int = None
+
+
+def classify_uscs_coarse(gravel_percent, sand_percent, fines_percent):
+    """Simpleng USCS symbol na kaya ng firmware (walang Atterberg/gradation data)."""
+    if fines_percent >= 50:
+        return "ML"
+    prefix = "G" if gravel_percent > sand_percent else "S"
+    if fines_percent < 5:
+        return f"{prefix}P"
+    if fines_percent <= 12:
+        return f"{prefix}P-{prefix}M"
+    return f"{prefix}M"
+
+
+class FakeESP32State:
+    """Isang scale lang ang device, kaya shared ang state gaya ng totoong ESP32."""
+
+    def __init__(self, rng):
+        self._lock = threading.Lock()
+        self._rng = rng
+        self.total_weight = None
+        self.gravel_weight = None
+        self.commands = 0
+
+    def handle(self, cmd):
+        with self._lock:
+            self.commands += 1
+            rng = self._rng
+            if cmd == "1":
+                self.total_weight = round(rng.uniform(400.0, 600.0), 2)
+                self.gravel_weight = None
+                return {"status": "total_weight", "value": self.total_weight,
+                        "message": "Place gravel fraction, press 2..."}
+            if cmd == "2":
+                total = self.total_weight or round(rng.uniform(400.0, 600.0), 2)
+                self.total_weight = total
+                self.gravel_weight = round(total * rng.uniform(0.05, 0.35), 2)
+                return {"status": "gravel_weight", "value": self.gravel_weight,
+                        "message": "Place sand fraction, press 3..."}
+            if cmd == "W":
+                return {"status": "weight_check", "value": round(rng.uniform(0.0, 600.0), 2),
+                        "message": "Current weight"}
+            if cmd == "3":
+                total = self.total_weight or round(rng.uniform(400.0, 600.0), 2)
+                gravel = self.gravel_weight if self.gravel_weight is not None else round(total * 0.2, 2)
+                sand = round((total - gravel) * rng.uniform(0.45, 0.9), 2)
+                gravel_percent = round(gravel / total * 100, 2)
+                sand_percent = round(sand / total * 100, 2)
+                fines_percent = round(100 - gravel_percent - sand_percent, 2)
+                return {
+                    "status": "results",
+                    "message": "Done. Press R to reset",
+                    "total_weight": total,
+                    "gravel_weight": gravel,
+                    "sand_weight": sand,
+                    "gravel_percent": gravel_percent,
+                    "sand_percent": sand_percent,
+                    "fines_percent": fines_percent,
+                    "soil_type": classify_uscs_coarse(gravel_percent, sand_percent, fines_percent),
+                }
+            if cmd == "R":
+                self.total_weight = None
+                self.gravel_weight = None
+                return {"status": "reset", "message": "System reset."}
+            return None
+
+
+def make_handler(config, state, rng):
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, code, body, content_type):
+            payload = body.encode()
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            with rng_lock:
+                delay = config.delay_ms + rng.uniform(0, config.jitter_ms)
+                fault = rng.choice(config.fault_modes) if rng.random() < config.fault_rate else None
+            if delay:
+                time.sleep(delay / 1000.0)
+
+            url = urlparse(self.path)
+            if url.path == "/":
+                return self._send(200, "ESP32 OK", "text/plain")
+            if url.path != "/command":
+                return self._send(404, "Not found", "text/plain")
+
+            if fault == "timeout":
+                time.sleep(config.timeout_s)
+            elif fault == "drop":
+                self.close_connection = True
+                self.connection.close()
+                return
+            elif fault == "html":
+                return self._send(200, "<html><body>ESP32 busy</body></html>", "text/html")
+            elif fault == "http_500":
+                return self._send(500, json.dumps({"status": "error"}), "application/json")
+            elif fault == "invalid_json":
+                return self._send(200, "{\"status\": ", "application/json")
+
+            cmd = parse_qs(url.query).get("input", [""])[0]
+            data = state.handle(cmd)
+            if data is None:
+                return self._send(400, json.dumps({"status": "error", "message": "Unknown command"}),
+                                  "application/json")
+            self._send(200, json.dumps(data), "application/json")
+
+    return Handler
+
+
+class FakeESP32Server:
+    """Tumatakbo sa background thread; `url` ang gagamitin bilang ESP32_IP."""
+
+    def __init__(self, host="127.0.0.1", port=0, config=None):
+        self.config = config or ESP32Config()
+        rng = random.Random(self.config.seed)
+        self.state = FakeESP32State(random.Random(self.config.seed))
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.config, self.state, rng))
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-esp32", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated ESP32 /command relay")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--fault-rate", type=float, default=0.0)
+    parser.add_argument("--fault-modes", default=",".join(FAULT_MODES))
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = ESP32Config(
+        delay_ms=args.delay_ms,
+        jitter_ms=args.jitter_ms,
+        fault_rate=args.fault_rate,
+        fault_modes=tuple(m for m in args.fault_modes.split(",") if m),
+        seed=args.seed,
+    )
+    server = FakeESP32Server(args.host, args.port, config)
+    print(f"Fake ESP32 listening on {server.url}")
+    server.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+# ========================================
+# Local Supabase Fake (bench stand-in)
+# ========================================
+# In-memory na bersyon ng mga Supabase API na ginagamit ng backend at ng
+# dashboards, para walang live project na kailangan sa benchmarks:
+#   Auth     - GET /auth/v1/user, DELETE /auth/v1/admin/users/<id>
+#   Tables   - GET/POST/PATCH/DELETE /rest/v1/<table> (PostgREST subset:
+#              select, eq/neq/gt/gte/lt/lte/in/ilike/or filters, order, limit, offset,
+#              single-object Accept header)
+#   Storage  - POST/PUT /storage/v1/object/<bucket>/<path>
+#
+# Bearer tokens ay "bench-token-<user>"; "bench-token-admin" ay admin.
+# May configurable na latency per API para gayahin ang network round trip.
+#
+#   python -m bench.fake_supabase --port 8082 --seed-rows 5000
+import argparse
+import json
+import operator
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlparse
+
+from bench.fake_esp32 import classify_uscs_coarse
+
+# JWT-shaped para pumasa sa key validation ng supabase-py
+SERVICE_ROLE_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.YmVuY2g"
+TOKEN_PREFIX = "bench-token-"
+ADMIN_TOKEN = f"{TOKEN_PREFIX}admin"
+
+CNN_TYPES = ("Clay Sand", "Silty Sand", "Uncertain")
+STATUSES = ("PENDING", "APPROVED", "DISAPPROVED")
+
+
+@dataclass
+class SupabaseLatency:
+    auth_ms: float = 0.0
+    rest_ms: float = 0.0
+    storage_ms: float = 0.0
+
+
+def user_id_for(name):
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"bench-user/{name}"))
+
+
+def token_for(name):
+    return f"{TOKEN_PREFIX}{name}"
+
+
+def _coerce(value):
+    """PostgREST filter values ay string; subukang gawing number/bool."""
+    if value in ("true", "false"):
+        return value == "true"
+    if value == "null":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+_COMPARE = {
+    "eq": operator.eq,
+    "neq": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+
+def _ilike(value, pattern):
+    if value is None:
+        return False
+    regex = re.escape(pattern).replace("%", ".*").replace(r"\*", ".*")
+    return re.fullmatch(regex, str(value), re.IGNORECASE | re.DOTALL) is not None
+
+
+def _matches(row, column, op, raw):
+    if op == "or":
+        parts = [p.split(".", 2) for p in raw.strip("()").split(",")]
+        return any(_matches(row, *part) for part in parts if len(part) == 3)
+    value = row.get(column)
+    if op == "ilike":
+        return _ilike(value, raw)
+    if op == "in":
+        options = [_coerce(v.strip('"')) for v in raw.strip("()").split(",")]
+        return value in options
+    if op == "is":
+        return value is _coerce(raw)
+    compare = _COMPARE.get(op)
+    if compare is None:
+        return True
+    target = _coerce(raw)
+    if op not in ("eq", "neq") and value is None:
+        return False
+    try:
+        return compare(value, target)
+    except TypeError:
+        # hal. ISO timestamp vs. coerced number; ikumpara bilang string
+        return compare(str(value), str(target))
+
+
+class FakeSupabaseStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tables = {"soil_analysis_results": [], "profiles": []}
+        self.objects = {}  # "bucket/path" -> size sa bytes (hindi sine-save ang laman)
+        self._next_id = {}
+        self.users = {}
+        self.add_user("admin", role="admin")
+
+    def add_user(self, name, role="engineer"):
+        user_id = user_id_for(name)
+        self.users[token_for(name)] = user_id
+        self.tables["profiles"].append({"id": user_id, "role": role, "username": name})
+        return user_id
+
+    def seed_results(self, count, engineers=10, days=180, seed=0):
+        """Mag-generate ng realistic na soil_analysis_results rows."""
+        rng = random.Random(seed)
+        engineer_ids = [self.add_user(f"engineer{i}") for i in range(engineers)]
+        now = datetime.now(timezone.utc)
+        rows = []
+        for _ in range(count):
+            total = round(rng.uniform(400.0, 600.0), 2)
+            gravel = round(total * rng.uniform(0.05, 0.35), 2)
+            sand = round((total - gravel) * rng.uniform(0.45, 0.9), 2)
+            gravel_percent = round(gravel / total * 100, 2)
+            sand_percent = round(sand / total * 100, 2)
+            fines_percent = round(100 - (gravel + sand) / total * 100, 2)
+            rows.append({
+                "engineer_id": rng.choice(engineer_ids),
+                "location": f"Barangay {rng.randint(1, 50)}, Cebu",
+                "total_weight": total,
+                "gravel_weight": gravel,
+                "sand_weight": sand,
+                "gravel_percent": gravel_percent,
+                "sand_percent": sand_percent,
+                "fines_percent": fines_percent,
+                "soil_type": classify_uscs_coarse(gravel_percent, sand_percent, fines_percent),
+                "predicted_soil_type": rng.choice(CNN_TYPES),
+                "image_soil_type": "Not provided",
+                "status": rng.choice(STATUSES),
+                "created_at": (now - timedelta(seconds=rng.uniform(0, days * 86400))).isoformat(),
+            })
+        rows.sort(key=lambda r: r["created_at"])
+        self.insert("soil_analysis_results", rows)
+        return engineer_ids
+
+    def insert(self, table, rows):
+        with self._lock:
+            target = self.tables.setdefault(table, [])
+            inserted = []
+            for row in rows:
+                row = dict(row)
+                if "id" not in row:
+                    self._next_id[table] = self._next_id.get(table, 0) + 1
+                    row["id"] = self._next_id[table]
+                row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+                target.append(row)
+                inserted.append(row)
+            return inserted
+
+    def query(self, table, filters, order=None, limit=None, offset=0):
+        with self._lock:
+            rows = [r for r in self.tables.get(table, []) if all(_matches(r, *f) for f in filters)]
+        for column, descending in reversed(order or []):
+            rows.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=descending)
+        rows = rows[offset:]
+        if limit is not None:
+            rows = rows[:limit]
+        return rows
+
+    def update(self, table, filters, values):
+        with self._lock:
+            updated = []
+            for row in self.tables.get(table, []):
+                if all(_matches(row, *f) for f in filters):
+                    row.update(values)
+                    updated.append(dict(row))
+            return updated
+
+    def delete(self, table, filters):
+        with self._lock:
+            rows = self.tables.get(table, [])
+            kept = [r for r in rows if not all(_matches(r, *f) for f in filters)]
+            removed = [r for r in rows if all(_matches(r, *f) for f in filters)]
+            self.tables[table] = kept
+            return removed
+
+
+def _parse_query(query):
+    select = None
+    filters = []
+    order = []
+    limit = None
+    offset = 0
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        if key == "select":
+            select = [c.strip() for c in value.split(",")] if value and value != "*" else None
+        elif key == "order":
+            for part in value.split(","):
+                bits = part.split(".")
+                order.append((bits[0], len(bits) > 1 and bits[1] == "desc"))
+        elif key == "limit":
+            limit = int(value)
+        elif key == "offset":
+            offset = int(value)
+        elif key == "or":
+            filters.append((None, "or", value))
+        elif "." in value:
+            op, raw = value.split(".", 1)
+            filters.append((key, op, raw))
+    return select, filters, order, limit, offset
+
+
+def _project(rows, select):
+    if not select:
+        return rows
+    return [{c: r.get(c) for c in select} for r in rows]
+
+
+def make_handler(store, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, code, body=None, headers=None):
+            payload = b"" if body is None else json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _bearer(self):
+            auth = self.headers.get("Authorization", "")
+            return auth.split("Bearer ", 1)[1] if auth.startswith("Bearer ") else None
+
+        def _dispatch(self, method):
+            url = urlparse(self.path)
+            path = url.path
+            if path.startswith("/auth/v1/"):
+                time.sleep(latency.auth_ms / 1000.0)
+                return self._auth(method, path[len("/auth/v1/"):])
+            if path.startswith("/rest/v1/"):
+                time.sleep(latency.rest_ms / 1000.0)
+                return self._rest(method, path[len("/rest/v1/"):], url.query)
+            if path.startswith("/storage/v1/object/"):
+                time.sleep(latency.storage_ms / 1000.0)
+                return self._storage(method, unquote(path[len("/storage/v1/object/"):]))
+            self._send(404, {"message": "Not found"})
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PUT(self):
+            self._dispatch("PUT")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+        # --- Auth ---
+        def _auth(self, method, path):
+            if method == "GET" and path == "user":
+                user_id = store.users.get(self._bearer())
+                if not user_id:
+                    return self._send(401, {"code": 401, "msg": "invalid JWT"})
+                return self._send(200, {
+                    "id": user_id,
+                    "aud": "authenticated",
+                    "role": "authenticated",
+                    "app_metadata": {"provider": "email"},
+                    "user_metadata": {},
+                    "created_at": "2024-01-01T00:00:00Z",
+                })
+            if method == "DELETE" and path.startswith("admin/users/"):
+                user_id = path.rsplit("/", 1)[1]
+                for token, uid in list(store.users.items()):
+                    if uid == user_id:
+                        del store.users[token]
+                return self._send(200, {})
+            self._send(404, {"msg": "Not found"})
+
+        # --- PostgREST ---
+        def _rest(self, method, table, query):
+            select, filters, order, limit, offset = _parse_query(query)
+            wants_object = "vnd.pgrst.object" in self.headers.get("Accept", "")
+            returns = "return=representation" in self.headers.get("Prefer", "")
+
+            if method == "GET":
+                rows = _project(store.query(table, filters, order, limit, offset), select)
+                if wants_object:
+                    if len(rows) != 1:
+                        return self._send(406, {"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned"})
+                    return self._send(200, rows[0])
+                return self._send(200, rows, {"Content-Range": f"{offset}-{offset + max(len(rows) - 1, 0)}/*"})
+
+            if method == "POST":
+                body = json.loads(self._body() or b"[]")
+                rows = store.insert(table, body if isinstance(body, list) else [body])
+                return self._send(201, _project(rows, select) if returns else [])
+
+            if method == "PATCH":
+                rows = store.update(table, filters, json.loads(self._body() or b"{}"))
+                return self._send(200, _project(rows, select) if returns else [])
+
+            if method == "DELETE":
+                rows = store.delete(table, filters)
+                return self._send(200, _project(rows, select) if returns else [])
+
+            self._send(405, {"message": "Method not allowed"})
+
+        # --- Storage ---
+        def _storage(self, method, key):
+            if method not in ("POST", "PUT"):
+                return self._send(405, {"message": "Method not allowed"})
+            size = len(self._body())
+            with store._lock:
+                store.objects[key] = size
+            self._send(200, {"Key": key, "Id": str(uuid.uuid4())})
+
+    return Handler
+
+
+class FakeSupabaseServer:
+    """Tumatakbo sa background thread; `url` ang gagamitin bilang SUPABASE_URL."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=None, store=None):
+        self.store = store or FakeSupabaseStore()
+        self.latency = latency or SupabaseLatency()
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.store, self.latency))
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-supabase", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Supabase auth/table/storage fake")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--seed-rows", type=int, default=0)
+    parser.add_argument("--auth-ms", type=float, default=0.0)
+    parser.add_argument("--rest-ms", type=float, default=0.0)
+    parser.add_argument("--storage-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeSupabaseServer(args.host, args.port, SupabaseLatency(args.auth_ms, args.rest_ms, args.storage_ms))
+    if args.seed_rows:
+        server.store.seed_results(args.seed_rows)
+    print(f"Fake Supabase listening on {server.url}")
+    print(f"  SUPABASE_SERVICE_ROLE_KEY={SERVICE_ROLE_KEY}")
+    print(f"  Admin token: {ADMIN_TOKEN}")
+    server.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
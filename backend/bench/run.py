@@ -0,0 +1,285 @@
+# ========================================
+# Benchmark Runner
+# ========================================
+# Pinapatakbo ang backend (subprocess) laban sa simulated ESP32 at local
+# Supabase fake, tapos nire-report ang p50/p95/p99 latency, throughput at
+# memory ng bawat scenario. Naka-save ang resulta sa bench/results/ na
+# naka-key sa git commit para ma-compare (python -m bench.compare).
+#
+# Mula sa backend/:
+#   python -m bench.run                                  # lahat ng scenarios
+#   python -m bench.run --scenarios predict_burst --requests 500 --concurrency 32
+#   python -m bench.run --esp32-delay-ms 150 --esp32-fault-rate 0.05 --stand-in-model
+import argparse
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+from bench.fake_esp32 import ESP32Config, FakeESP32Server
+from bench.fake_supabase import SERVICE_ROLE_KEY, FakeSupabaseServer, SupabaseLatency
+from bench.scenarios import SCENARIOS, BenchContext, make_soil_image, summarize_latencies
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git(*args):
+    try:
+        return subprocess.check_output(["git", *args], cwd=BACKEND_DIR, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _rss_mb(pid):
+    """Kasalukuyang RSS ng process (Linux /proc); None kung hindi available."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        return None
+    return None
+
+
+class RSSMonitor:
+    """Sina-sample ang RSS ng backend process habang tumatakbo ang scenario."""
+
+    def __init__(self, pid, interval=0.05):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = _rss_mb(self.pid)
+            if rss is not None:
+                self.samples.append(rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self):
+        if not self.samples:
+            return {"server_rss_start_mb": None, "server_rss_peak_mb": None, "server_rss_end_mb": None}
+        return {
+            "server_rss_start_mb": round(self.samples[0], 1),
+            "server_rss_peak_mb": round(max(self.samples), 1),
+            "server_rss_end_mb": round(self.samples[-1], 1),
+        }
+
+
+def start_backend(port, env, stand_in_model, startup_timeout):
+    cmd = [sys.executable, "-m", "bench.server", "--port", str(port)]
+    if stand_in_model:
+        cmd.append("--stand-in-model")
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Backend exited during startup (code {proc.returncode})")
+        try:
+            if requests.get(f"{url}/", timeout=1).ok:
+                return proc, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("Backend did not become ready in time")
+
+
+def scenario_kwargs(name, args):
+    if name == "predict_burst":
+        return {"requests_total": args.requests, "concurrency": args.concurrency}
+    if name == "session":
+        return {"sessions": args.sessions, "concurrency": args.session_concurrency}
+    if name == "history":
+        return {"loads": args.history_loads, "concurrency": args.concurrency}
+    if name == "export":
+        return {"pulls": args.export_pulls, "concurrency": 2, "export_format": args.export_format}
+    return {}
+
+
+def run(args):
+    esp32 = FakeESP32Server(config=ESP32Config(
+        delay_ms=args.esp32_delay_ms,
+        jitter_ms=args.esp32_jitter_ms,
+        fault_rate=args.esp32_fault_rate,
+        seed=args.seed,
+    )).start()
+    supabase = FakeSupabaseServer(latency=SupabaseLatency(
+        auth_ms=args.supabase_auth_ms,
+        rest_ms=args.supabase_rest_ms,
+        storage_ms=args.supabase_storage_ms,
+    )).start()
+    engineer_ids = supabase.store.seed_results(args.history_rows, engineers=args.engineers, seed=args.seed)
+
+    env = dict(os.environ)
+    env.update({
+        "SUPABASE_URL": supabase.url,
+        "SUPABASE_SERVICE_ROLE_KEY": SERVICE_ROLE_KEY,
+        "ESP32_IP": esp32.url,
+        "LOG_LEVEL": args.log_level,
+        "PROFILE_SAMPLE_RATE": "0",
+        # Iisang IP ang lahat ng bench clients; i-on lang kapag ang limits mismo ang sinusukat
+        "RATE_LIMIT_ENABLED": "1" if args.rate_limits else "0",
+        "TF_CPP_MIN_LOG_LEVEL": "2",
+    })
+    port = args.port or _free_port()
+    proc, backend_url = start_backend(port, env, args.stand_in_model, args.startup_timeout)
+
+    ctx = BenchContext(
+        backend_url=backend_url,
+        supabase_url=supabase.url,
+        image_b64=make_soil_image(seed=args.seed),
+        engineer_ids=engineer_ids,
+        engineers=args.engineers,
+    )
+
+    report = {
+        "meta": {
+            "git_sha": _git("rev-parse", "HEAD"),
+            "git_dirty": bool(_git("status", "--porcelain", "--", ".")),
+            "label": args.label,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": vars(args),
+        },
+        "scenarios": {},
+    }
+
+    try:
+        # Warm-up para hindi masama sa sukat ang unang TF graph trace
+        for _ in range(args.warmup):
+            requests.post(f"{backend_url}/predict", json={"image": ctx.image_b64}, timeout=120)
+
+        for name in args.scenarios:
+            print(f"Running scenario: {name}")
+            with RSSMonitor(proc.pid) as monitor:
+                result = SCENARIOS[name](ctx, **scenario_kwargs(name, args))
+            total = len(result.latencies)
+            report["scenarios"][name] = {
+                "requests": total,
+                "errors": result.errors,
+                "error_kinds": result.error_kinds,
+                "wall_s": round(result.wall_s, 3),
+                "throughput_rps": round(total / result.wall_s, 2) if result.wall_s else 0.0,
+                "latency_ms": summarize_latencies(result.latencies),
+                "steps": {step: summarize_latencies(v) for step, v in result.steps.items()},
+                "memory": monitor.summary(),
+            }
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        esp32.stop()
+        supabase.stop()
+
+    report["meta"]["bench_client_maxrss_mb"] = round(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)
+    return report
+
+
+def save_report(report, results_dir=RESULTS_DIR):
+    results_dir.mkdir(parents=True, exist_ok=True)
+    sha = (report["meta"]["git_sha"] or "nogit")[:10]
+    if report["meta"]["git_dirty"]:
+        sha += "-dirty"
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    label = f"_{report['meta']['label']}" if report["meta"]["label"] else ""
+    path = results_dir / f"{stamp}_{sha}{label}.json"
+    path.write_text(json.dumps(report, indent=2))
+    return path
+
+
+def print_report(report):
+    print()
+    print(f"{'scenario':<16}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+    for name, data in report["scenarios"].items():
+        lat = data["latency_ms"]
+        peak = data["memory"]["server_rss_peak_mb"]
+        print(f"{name:<16}{data['requests']:>7}{data['errors']:>6}{data['throughput_rps']:>9.1f}"
+              f"{lat['p50']:>10.1f}{lat['p95']:>10.1f}{lat['p99']:>10.1f}"
+              f"{(peak if peak is not None else float('nan')):>10.1f}")
+        for step, s in data["steps"].items():
+            print(f"  {step:<20}{s['count']:>7}{'':>15}{s['p50']:>10.1f}{s['p95']:>10.1f}{s['p99']:>10.1f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Geotech backend load tests and benchmarks")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=200, help="predict_burst total requests")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--session-concurrency", type=int, default=4)
+    parser.add_argument("--history-loads", type=int, default=60)
+    parser.add_argument("--history-rows", type=int, default=5000)
+    parser.add_argument("--export-pulls", type=int, default=4)
+    parser.add_argument("--export-format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--engineers", type=int, default=10)
+    parser.add_argument("--esp32-delay-ms", type=float, default=80.0)
+    parser.add_argument("--esp32-jitter-ms", type=float, default=40.0)
+    parser.add_argument("--esp32-fault-rate", type=float, default=0.0)
+    parser.add_argument("--supabase-auth-ms", type=float, default=30.0)
+    parser.add_argument("--supabase-rest-ms", type=float, default=40.0)
+    parser.add_argument("--supabase-storage-ms", type=float, default=120.0)
+    parser.add_argument("--stand-in-model", action="store_true")
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="Keep per-user rate limits enabled in the backend under test")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--startup-timeout", type=float, default=180.0)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    print_report(report)
+    if not args.no_save:
+        print(f"\nSaved: {save_report(report)}")
+
+
+if __name__ == "__main__":
+    main()
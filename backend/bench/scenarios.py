@@ -0,0 +1,233 @@
+# ========================================
+# Benchmark Scenarios
+# ========================================
+# Bawat scenario ay nagbabalik ng ScenarioResult na may per-request
+# latencies (seconds), error count at wall-clock duration.
+import base64
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+import requests
+
+from bench.fake_supabase import ADMIN_TOKEN, SERVICE_ROLE_KEY, token_for
+
+
+@dataclass
+class BenchContext:
+    backend_url: str
+    supabase_url: str
+    image_b64: str
+    engineer_ids: list
+    engineers: int
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+    error_kinds: dict = field(default_factory=dict)
+    steps: dict = field(default_factory=dict)  # step -> list ng latencies
+    wall_s: float = 0.0
+
+    def record(self, latency, ok, step=None, kind=None):
+        self.latencies.append(latency)
+        if step is not None:
+            self.steps.setdefault(step, []).append(latency)
+        if not ok:
+            self.errors += 1
+            kind = kind or "error"
+            self.error_kinds[kind] = self.error_kinds.get(kind, 0) + 1
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile ng naka-sort na listahan."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(values):
+    ordered = sorted(values)
+    n = len(ordered)
+    return {
+        "count": n,
+        "p50": percentile(ordered, 50) * 1000,
+        "p95": percentile(ordered, 95) * 1000,
+        "p99": percentile(ordered, 99) * 1000,
+        "mean": (sum(ordered) / n * 1000) if n else 0.0,
+        "max": (ordered[-1] * 1000) if n else 0.0,
+    }
+
+
+def make_soil_image(size=(640, 480), seed=0, quality=85):
+    """Synthetic na brown/tan granular texture na papasa sa quality gate."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    base = np.array([60, 100, 150], dtype=np.float32)  # BGR na kulay-lupa
+    grain = rng.normal(0, 28, (h // 4, w // 4, 1)).astype(np.float32)
+    grain = cv2.resize(grain, (w, h), interpolation=cv2.INTER_NEAREST)[..., None]
+    noise = rng.normal(0, 10, (h, w, 3)).astype(np.float32)
+    img = np.clip(base + grain + noise, 0, 255).astype(np.uint8)
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("Failed to encode synthetic soil image")
+    return base64.b64encode(buf.tobytes()).decode()
+
+
+_local = threading.local()
+
+
+def _session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _local.session = session
+    return session
+
+
+def _timed(result, step, method, url, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = _session().request(method, url, **kwargs)
+        latency = time.perf_counter() - start
+        ok = response.status_code < 400
+        result.record(latency, ok, step, None if ok else f"http_{response.status_code}")
+        return response if ok else None
+    except requests.RequestException as e:
+        result.record(time.perf_counter() - start, False, step, type(e).__name__)
+        return None
+
+
+def _run_pool(result, concurrency, jobs, job):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(job, range(jobs)))
+    result.wall_s = time.perf_counter() - start
+    return result
+
+
+# ----------------------------------------
+# 1. Concurrent /predict bursts
+# ----------------------------------------
+def predict_burst(ctx, requests_total=200, concurrency=16):
+    result = ScenarioResult("predict_burst")
+    payload = {"image": ctx.image_b64}
+
+    def job(_):
+        _timed(result, "predict", "POST", f"{ctx.backend_url}/predict", json=payload, timeout=60)
+
+    return _run_pool(result, concurrency, requests_total, job)
+
+
+# ----------------------------------------
+# 2. Full weigh-wash-result sessions
+# ----------------------------------------
+def session_flow(ctx, sessions=20, concurrency=4):
+    """Capture -> 1 -> W -> 2 -> W -> 3 (save) -> R, gaya ng SoilAnalysis.jsx."""
+    result = ScenarioResult("session")
+    session_totals = []
+    totals_lock = threading.Lock()
+
+    def job(i):
+        token = token_for(f"engineer{i % max(ctx.engineers, 1)}")
+        start = time.perf_counter()
+        prediction = _timed(result, "predict", "POST", f"{ctx.backend_url}/predict",
+                            json={"image": ctx.image_b64}, timeout=60)
+        soil_type = prediction.json().get("soil_type") if prediction is not None else None
+        for cmd in ("1", "W", "2", "W"):
+            _timed(result, f"command_{cmd}", "GET", f"{ctx.backend_url}/command",
+                   params={"input": cmd}, timeout=30)
+        _timed(result, "command_3", "POST", f"{ctx.backend_url}/command", timeout=60,
+               headers={"Authorization": f"Bearer {token}"},
+               json={
+                   "input": "3",
+                   "image_soil_type": soil_type,
+                   "image_data": f"data:image/jpeg;base64,{ctx.image_b64}",
+                   "location": f"Bench site {i}",
+               })
+        _timed(result, "command_R", "GET", f"{ctx.backend_url}/command",
+               params={"input": "R"}, timeout=30)
+        with totals_lock:
+            session_totals.append(time.perf_counter() - start)
+
+    _run_pool(result, concurrency, sessions, job)
+    result.steps["session_total"] = session_totals
+    return result
+
+
+# ----------------------------------------
+# 3. Dashboard history loads
+# ----------------------------------------
+# Parehong queries na ginagawa ng EngineerHome/ExpertHome/ExpertDashboard
+# diretso sa Supabase (supabase-js), laban sa seeded na fake table.
+DASHBOARD_QUERIES = {
+    "engineer_home": "select=soil_type,status,created_at,id,location,gravel_percent,sand_percent,fines_percent",
+    "expert_home": "select=status,soil_type,created_at,location,engineer_id,id",
+    "expert_dashboard": ("select=id,engineer_id,total_weight,gravel_weight,sand_weight,gravel_percent,"
+                         "sand_percent,fines_percent,soil_type,predicted_soil_type,image_soil_type,"
+                         "created_at,status,location&order=created_at.desc"),
+}
+
+
+def history_loads(ctx, loads=60, concurrency=8):
+    """Browser-side table pulls vs. pre-aggregated GET /dashboard/stats."""
+    result = ScenarioResult("history")
+    headers = {"apikey": SERVICE_ROLE_KEY, "Authorization": f"Bearer {SERVICE_ROLE_KEY}"}
+    names = list(DASHBOARD_QUERIES) + ["backend_stats"]
+
+    def job(i):
+        name = names[i % len(names)]
+        if name == "backend_stats":
+            token = token_for(f"engineer{i % max(ctx.engineers, 1)}")
+            _timed(result, name, "GET", f"{ctx.backend_url}/dashboard/stats",
+                   headers={"Authorization": f"Bearer {token}"}, timeout=60)
+            return
+        query = DASHBOARD_QUERIES[name]
+        if name == "engineer_home":
+            query += f"&engineer_id=eq.{ctx.engineer_ids[i % len(ctx.engineer_ids)]}"
+        _timed(result, name, "GET", f"{ctx.supabase_url}/rest/v1/soil_analysis_results?{query}",
+               headers=headers, timeout=60)
+
+    return _run_pool(result, concurrency, loads, job)
+
+
+# ----------------------------------------
+# 4. Streaming exports
+# ----------------------------------------
+def export_pulls(ctx, pulls=4, concurrency=2, export_format="csv"):
+    """Buong-table GET /export/analysis-results; dapat flat ang server RSS kahit lumaki ang table."""
+    result = ScenarioResult("export")
+
+    def job(_):
+        start = time.perf_counter()
+        try:
+            response = _session().get(
+                f"{ctx.backend_url}/export/analysis-results",
+                params={"format": export_format},
+                headers={"Authorization": f"Bearer {ADMIN_TOKEN}"},
+                stream=True, timeout=300,
+            )
+            if response.status_code >= 400:
+                result.record(time.perf_counter() - start, False, "export", f"http_{response.status_code}")
+                return
+            for _chunk in response.iter_content(chunk_size=65536):
+                pass
+            result.record(time.perf_counter() - start, True, "export")
+        except requests.RequestException as e:
+            result.record(time.perf_counter() - start, False, "export", type(e).__name__)
+
+    return _run_pool(result, concurrency, pulls, job)
+
+
+SCENARIOS = {
+    "predict_burst": predict_burst,
+    "session": session_flow,
+    "history": history_loads,
+    "export": export_pulls,
+}
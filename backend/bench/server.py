@@ -0,0 +1,47 @@
+# ========================================
+# Backend launcher para sa benchmarks
+# ========================================
+# Pinapatakbo ang app.main sa uvicorn gamit ang environment na itinakda ng
+# bench.run (SUPABASE_URL, ESP32_IP, atbp). Kung wala ang trained model file,
+# puwedeng gumamit ng untrained MobileNetV2 na pareho ang input/output shape
+# para realistic pa rin ang forward-pass cost.
+#
+#   python -m bench.server --port 8000 --stand-in-model
+import argparse
+
+import uvicorn
+
+
+def install_stand_in_model(main):
+    """Untrained MobileNetV2 (224x224x3 -> len(CLASSES)); mali ang sagot, tama ang cost."""
+    from tensorflow import keras
+
+    model = keras.applications.MobileNetV2(
+        input_shape=(main.IMG_SIZE[1], main.IMG_SIZE[0], 3),
+        weights=None,
+        classes=len(main.CLASSES),
+        classifier_activation="softmax",
+    )
+    main.cnn_model = model
+    main.cnn_status = "loaded"
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the backend for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--stand-in-model", action="store_true",
+                        help="Use an untrained MobileNetV2 if the trained model is missing")
+    args = parser.parse_args()
+
+    from app import main as backend
+
+    if backend.cnn_model is None and args.stand_in_model:
+        install_stand_in_model(backend)
+
+    uvicorn.run(backend.app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
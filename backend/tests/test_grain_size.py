@@ -0,0 +1,96 @@
+# Boundary checks ng USCS rules sa app.grain_size
+# Mula sa backend/:  python -m pytest tests
+import math
+
+import numpy as np
+import pytest
+
+from app.grain_size import (
+    CLAY_OR_SILT, CLEAN_GRAVEL, CLEAN_SAND, GRAVEL_WITH_FINES, SAND_WITH_FINES,
+    SILTY_CLAYEY_GRAVEL, SILTY_CLAYEY_SAND, UNCLASSIFIED, WEIGHT_TOLERANCE_G,
+    classify_percentages, classify_weights, codes_for, validate_analysis,
+)
+
+
+def classify(gravel, sand, fines):
+    return int(classify_percentages([gravel], [sand], [fines])[0])
+
+
+@pytest.mark.parametrize("fines, sand_code, gravel_code", [
+    (4.99, CLEAN_SAND, CLEAN_GRAVEL),
+    (5.0, SAND_WITH_FINES, GRAVEL_WITH_FINES),
+    (12.0, SAND_WITH_FINES, GRAVEL_WITH_FINES),
+    (12.01, SILTY_CLAYEY_SAND, SILTY_CLAYEY_GRAVEL),
+    (49.99, SILTY_CLAYEY_SAND, SILTY_CLAYEY_GRAVEL),
+    (50.0, CLAY_OR_SILT, CLAY_OR_SILT),
+])
+def test_fines_boundaries(fines, sand_code, gravel_code):
+    coarse = 100.0 - fines
+    assert classify(coarse * 0.3, coarse * 0.7, fines) == sand_code
+    assert classify(coarse * 0.7, coarse * 0.3, fines) == gravel_code
+
+
+def test_gravel_sand_tie_is_sand():
+    assert classify(47.5, 47.5, 5.0) == SAND_WITH_FINES
+    assert classify(50.0, 50.0, 0.0) == CLEAN_SAND
+
+
+def test_nan_is_unclassified():
+    assert classify(float("nan"), 50.0, 10.0) == UNCLASSIFIED
+
+
+def test_weight_tolerance():
+    within = classify_weights([500.0], [250.0], [250.0 + WEIGHT_TOLERANCE_G])
+    beyond = classify_weights([500.0], [250.0], [250.0 + WEIGHT_TOLERANCE_G + 0.01])
+    assert within["valid"][0]
+    assert within["fines_percent"][0] == 0.0
+    assert not beyond["valid"][0]
+    assert math.isnan(beyond["fines_percent"][0])
+    assert beyond["soil_code"][0] == UNCLASSIFIED
+
+
+@pytest.mark.parametrize("total, gravel, sand", [
+    (0, 0, 0),
+    (500, -1, 100),
+    (500, 100, -1),
+    (None, 100, 100),
+    ("abc", 100, 100),
+])
+def test_invalid_weights(total, gravel, sand):
+    computed = classify_weights([total], [gravel], [sand])
+    assert not computed["valid"][0]
+    assert computed["soil_code"][0] == UNCLASSIFIED
+
+
+def test_symbol_mapping():
+    symbols = ["GW", "sp", " SP-SM ", "gc-gm", "SC", "CL", "Clean sand", "Silty or clayey gravel", "xyz", None]
+    expected = [CLEAN_GRAVEL, CLEAN_SAND, SAND_WITH_FINES, SILTY_CLAYEY_GRAVEL, SILTY_CLAYEY_SAND,
+                CLAY_OR_SILT, CLEAN_SAND, SILTY_CLAYEY_GRAVEL, UNCLASSIFIED, UNCLASSIFIED]
+    assert codes_for(symbols).tolist() == expected
+    assert codes_for(np.array([], dtype=object)).size == 0
+
+
+def test_validate_analysis_accepts_matching_device_values():
+    result = validate_analysis({
+        "total_weight": 500, "gravel_weight": 100, "sand_weight": 300,
+        "gravel_percent": 20.2, "sand_percent": 59.8, "fines_percent": 20.0, "soil_type": "SM",
+    })
+    assert result["valid"]
+    assert result["mismatches"] == []
+    assert result["computed"]["soil_type"] == "Silty or clayey sand"
+
+
+def test_validate_analysis_reports_mismatches():
+    result = validate_analysis({
+        "total_weight": 500, "gravel_weight": 100, "sand_weight": 300,
+        "gravel_percent": 21.0, "sand_percent": 60.0, "fines_percent": 20.0, "soil_type": "Clean sand",
+    })
+    assert result["mismatches"] == ["gravel_percent", "soil_type"]
+    assert result["computed"]["gravel_percent"] == 20.0
+
+
+def test_validate_analysis_non_numeric_and_missing():
+    assert validate_analysis({"total_weight": "abc", "gravel_weight": 1, "sand_weight": 2}) == {
+        "valid": False, "mismatches": [], "computed": None,
+    }
+    assert not validate_analysis({})["valid"]
@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { supabase } from '../supabaseClient';
+import { API_URL } from '../config';
 import { Sun, Moon, LogOut, Home, History, Download, Trash2, X, Beaker } from 'lucide-react';
 import Papa from 'papaparse';
 import { DateTime } from 'luxon';
@@ -153,12 +154,19 @@ const EngineerAnalysisHistory = () => {
       if (!['PENDING', 'DISAPPROVED'].includes(analysis.status?.toUpperCase())) {
         throw new Error('Only pending or disapproved analyses can be deleted.');
       }
-      await supabase.from('analysis_reviews').delete().eq('analysis_id', analysisId);
-      await supabase
-        .from('soil_analysis_results')
-        .delete()
-        .eq('id', analysisId)
-        .eq('engineer_id', (await supabase.auth.getUser()).data.user.id);
+      // Dumaan sa backend para mabawas din sa dashboard counters
+      const { data: { session } } = await supabase.auth.getSession();
+      const response = await fetch(`${API_URL}/analysis/${analysisId}`, {
+        method: 'DELETE',
+        headers: {
+          'Authorization': `Bearer ${session?.access_token}`,
+          'ngrok-skip-browser-warning': 'true',
+        },
+      });
+      if (!response.ok) {
+        const body = await response.json().catch(() => ({}));
+        throw new Error(body.detail || 'Failed to delete analysis.');
+      }
 
       const updatedAnalyses = analyses.filter((item) => item.id !== analysisId);
       setAnalyses(updatedAnalyses);
@@ -172,7 +180,7 @@ const EngineerAnalysisHistory = () => {
             formatDateTime(item.created_at).toLowerCase().includes(searchQuery.toLowerCase()))
         )
       );
-      alert('Analysis deleted successfully. Refresh the dashboard to update charts.');
+      alert('Analysis deleted successfully.');
     } catch (err) {
       setDeleteError(err.message || 'An unexpected error occurred.');
     }
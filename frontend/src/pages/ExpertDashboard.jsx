@@ -1,5 +1,6 @@
 import { useEffect, useState } from 'react';
 import { supabase } from '../supabaseClient';
+import { API_URL } from '../config';
 import { Sun, Moon, LogOut, Home, X } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
 import { DateTime } from 'luxon';
@@ -233,13 +234,20 @@ const ExpertDashboard = () => {
         showNotification('error', 'Error submitting review.');
       } else {
         const statusToSave = selectedStatus || 'PENDING';
-        const { error: statusError } = await supabase
-          .from('soil_analysis_results')
-          .update({ status: statusToSave })
-          .eq('id', currentAnalysisId);
+        // Dumaan sa backend para ma-update din ang dashboard counters
+        const { data: { session } } = await supabase.auth.getSession();
+        const statusResponse = await fetch(`${API_URL}/analysis/${currentAnalysisId}/status`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+            'Authorization': `Bearer ${session?.access_token}`,
+            'ngrok-skip-browser-warning': 'true',
+          },
+          body: JSON.stringify({ status: statusToSave }),
+        });
 
-        if (statusError) {
-          console.error('Status update error:', statusError);
+        if (!statusResponse.ok) {
+          console.error('Status update error:', statusResponse.status);
           showNotification('error', 'Review saved but updating status failed.');
           return;
         }
@@ -1,6 +1,7 @@
 import { useNavigate } from 'react-router-dom';
 import { useEffect, useState } from 'react';
 import { supabase } from '../supabaseClient';
+import { API_URL } from '../config';
 import { Sun, Moon, LogOut, Home, BarChart2, CheckCircle, AlertCircle, Clock, TrendingUp, PieChart as PieChartIcon } from 'lucide-react';
 import {
   BarChart,
@@ -88,59 +89,43 @@ const ExpertHome = () => {
     setLoading(true);
     setError(null);
     try {
-      const { data, error } = await supabase
-        .from('soil_analysis_results')
-        .select('status, soil_type, created_at, location, engineer_id, id')
-        .order('created_at', { ascending: false });
-
-      if (error) throw new Error(error.message);
+      const { data: { session } } = await supabase.auth.getSession();
+      const token = session?.access_token;
+      if (!token) {
+        throw new Error('Authentication error');
+      }
 
-      if (data && data.length > 0) {
-        // Calculate statistics
-        const totalAnalyses = data.length;
-        const totalApproved = data.filter(d => d.status?.toUpperCase() === 'APPROVED').length;
-        const totalPending = data.filter(d => d.status?.toUpperCase() === 'PENDING' || !d.status).length;
-        const totalDisapproved = data.filter(d => d.status?.toUpperCase() === 'DISAPPROVED').length;
-        const approvalRate = totalAnalyses > 0 ? ((totalApproved / totalAnalyses) * 100).toFixed(1) : 0;
+      // Pre-aggregated sa backend; hindi na dina-download ang buong table
+      // 503 habang binubuo pa ng backend ang counters pagkatapos mag-start
+      let response;
+      for (let attempt = 0; ; attempt++) {
+        response = await fetch(`${API_URL}/dashboard/stats`, {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'ngrok-skip-browser-warning': 'true',
+          },
+        });
+        if (response.status !== 503 || attempt >= 5) break;
+        const retryAfter = Number(response.headers.get('Retry-After')) || 3;
+        await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+      }
+      if (!response.ok) {
+        throw new Error(`HTTP error: ${response.status}`);
+      }
+      const data = await response.json();
 
+      if (data.total_analyses > 0) {
         setStats({
-          totalAnalyses,
-          totalApproved,
-          totalPending,
-          totalDisapproved,
-          approvalRate: parseFloat(approvalRate),
+          totalAnalyses: data.total_analyses,
+          totalApproved: data.approved,
+          totalPending: data.pending,
+          totalDisapproved: data.disapproved,
+          approvalRate: data.approval_rate,
         });
 
-        // Get recent 5 analyses
-        setRecentAnalyses(data.slice(0, 5));
-
-        // Process status data
-        const statusCounts = data.reduce((acc, { status }) => {
-          const normalizedStatus = status?.toUpperCase() || 'UNKNOWN';
-          acc[normalizedStatus] = (acc[normalizedStatus] || 0) + 1;
-          return acc;
-        }, {});
-        const totalStatus = Object.values(statusCounts).reduce((sum, count) => sum + count, 0);
-        const formattedStatus = Object.entries(statusCounts).map(([status, count]) => ({
-          status,
-          count,
-          percentage: totalStatus > 0 ? parseFloat(((count / totalStatus) * 100).toFixed(1)) : 0,
-        }));
-        setStatusData(formattedStatus);
-
-        // Process soil type data
-        const soilTypeCounts = data.reduce((acc, { soil_type }) => {
-          const normalizedSoilType = soil_type || 'Unknown';
-          acc[normalizedSoilType] = (acc[normalizedSoilType] || 0) + 1;
-          return acc;
-        }, {});
-        const totalSoilType = Object.values(soilTypeCounts).reduce((sum, count) => sum + count, 0);
-        const formattedSoilType = Object.entries(soilTypeCounts).map(([soil_type, count]) => ({
-          soil_type,
-          count,
-          percentage: totalSoilType > 0 ? parseFloat(((count / totalSoilType) * 100).toFixed(1)) : 0,
-        }));
-        setSoilTypeData(formattedSoilType);
+        setRecentAnalyses(data.recent);
+        setStatusData(data.by_status);
+        setSoilTypeData(data.by_soil_type);
       }
     } catch (err) {
       console.error('Error fetching data:', err);
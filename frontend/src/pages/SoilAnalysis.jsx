@@ -174,6 +174,8 @@ function SoilAnalysis() {
         headers: { 
           'Content-Type': 'application/json',
           'ngrok-skip-browser-warning': 'true',
+          // Para per-user ang rate limit (hindi shared ang IP ng buong lab)
+          ...(jwtToken && { 'Authorization': `Bearer ${jwtToken}` }),
         },
         body: JSON.stringify({ image: imageData.split(',')[1] }),
       });
@@ -227,7 +229,10 @@ function SoilAnalysis() {
         const url = `${API_URL}/command?input=${cmd}`;
         response = await fetch(url, { 
           method: 'GET',
-          headers: { 'ngrok-skip-browser-warning': 'true' }
+          headers: {
+            'ngrok-skip-browser-warning': 'true',
+            ...(jwtToken && { 'Authorization': `Bearer ${jwtToken}` }),
+          }
         });
       }
 